@@ -2,6 +2,9 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, Asyn
 from app.resources.config import settings
 from app.models.base import Base
 from sqlalchemy import text
+from app.database.migrations import run_schema_migrations
+from app.database.pool import InstrumentedPool, instrumentar
+from app.services.metrics import instrumentar_consultas
 
 SQLALCHEMY_DATABASE_URL = (
     f"postgresql+asyncpg://{settings.database_username}:"
@@ -11,7 +14,24 @@ SQLALCHEMY_DATABASE_URL = (
     f"{settings.database_name}"
 )
 
-engine = create_async_engine(SQLALCHEMY_DATABASE_URL, future=True)
+engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    future=True,
+    poolclass=InstrumentedPool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_recycle=settings.db_pool_recycle,
+    connect_args={
+        # cache de prepared statements do dialeto e do próprio asyncpg
+        # (use 0 com pgbouncer em modo transaction)
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+        "statement_cache_size": settings.db_statement_cache_size,
+    },
+)
+instrumentar(engine)
+instrumentar_consultas(engine)
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
@@ -28,6 +48,16 @@ async def startup():
         await conn.execute(text("CREATE SCHEMA IF NOT EXISTS data"))
         await conn.execute(text("CREATE SCHEMA IF NOT EXISTS public"))
         await conn.run_sync(Base.metadata.create_all)
+        await run_schema_migrations(conn)
+        # create_all não adiciona índices novos em tabelas que já existem
+        await conn.run_sync(create_missing_indexes)
+
+
+def create_missing_indexes(sync_conn):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
 
 async def shutdown():
     await engine.dispose()
@@ -3,7 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Role, User
 from app.database import db
 from app.resources.config import settings
-from app.services.security import get_password_hash
+from app.services.security import password_hasher
 
 
 async def create_first_user():
@@ -39,7 +39,7 @@ async def create_first_user():
         # Criando usuário admin
         user = User(
             username=settings.first_login,
-            hashed_password=get_password_hash(settings.first_password),
+            hashed_password=await password_hasher.hash(settings.first_password),
             email=settings.first_email,
             role_id=role.id,
             disabled=False
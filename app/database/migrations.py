@@ -0,0 +1,76 @@
+from sqlalchemy import text
+
+from app.services.faixas import intervalos
+
+
+def _contagem_faixas() -> str:
+    """jsonb {rótulo: quantidade} com os mesmos intervalos do pd.cut da predição."""
+    pares = [
+        f"'{rotulo}', count(*) FILTER (WHERE f.preco > {inicio} AND f.preco <= {fim})"
+        for rotulo, inicio, fim in intervalos()
+    ]
+    return "jsonb_build_object(" + ", ".join(pares) + ")"
+
+
+# Estatísticas por categoria, atualizadas com REFRESH CONCURRENTLY após a
+# ingestão (app.services.category_stats). Mudar bins/labels exige um
+# DROP MATERIALIZED VIEW para que ela seja recriada.
+CATEGORY_STATS_VIEW = f"""
+CREATE MATERIALIZED VIEW IF NOT EXISTS data.category_stats AS
+SELECT
+    r.category,
+    count(*) AS quantidade,
+    count(f.preco) AS com_preco,
+    min(f.preco) AS minimo,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY f.preco) AS mediana,
+    max(f.preco) AS maximo,
+    {_contagem_faixas()} AS faixas,
+    now() AS atualizado_em
+FROM data.registrations r
+LEFT JOIN data.registration_features f ON f.registration_id = r.id
+GROUP BY r.category
+"""
+
+# Alterações de schema em tabelas existentes, que o create_all não faz.
+# Cada comando precisa ser idempotente: todos rodam a cada startup.
+SCHEMA_MIGRATIONS = [
+    # Registration.data: json -> jsonb (permite índices GIN e de expressão)
+    """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'data' AND table_name = 'registrations'
+              AND column_name = 'data' AND data_type = 'json'
+        ) THEN
+            ALTER TABLE data.registrations
+                ALTER COLUMN data TYPE jsonb USING data::jsonb;
+        END IF;
+    END
+    $$
+    """,
+    # Registration: hash do conteúdo para o upsert idempotente
+    "ALTER TABLE data.registrations ADD COLUMN IF NOT EXISTS data_hash varchar",
+    # TrainingRun: estimador escolhido e benchmark do artefato
+    "ALTER TABLE data.training_runs ADD COLUMN IF NOT EXISTS estimador varchar",
+    "ALTER TABLE data.training_runs ADD COLUMN IF NOT EXISTS benchmark jsonb",
+    # TrainingRun: estado do job, compartilhado entre os workers
+    "ALTER TABLE data.training_runs ADD COLUMN IF NOT EXISTS etapa varchar",
+    "ALTER TABLE data.training_runs ADD COLUMN IF NOT EXISTS resultado jsonb",
+    "ALTER TABLE data.training_runs ADD COLUMN IF NOT EXISTS criado_em timestamptz",
+    "ALTER TABLE data.training_runs ADD COLUMN IF NOT EXISTS atualizado_em timestamptz",
+    # No máximo um treino pendente ou executando, entre todos os workers
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_training_runs_ativo
+        ON data.training_runs ((true))
+        WHERE status IN ('pendente', 'executando')
+    """,
+    CATEGORY_STATS_VIEW,
+    # REFRESH ... CONCURRENTLY exige um índice único
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_category_stats_category ON data.category_stats (category)",
+]
+
+
+async def run_schema_migrations(conn):
+    for statement in SCHEMA_MIGRATIONS:
+        await conn.execute(text(statement))
@@ -0,0 +1,88 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    """Contadores de uso do pool de conexões."""
+
+    def __init__(self):
+        self.conexoes_abertas = 0
+        self.conexoes_fechadas = 0
+        self.conexoes_invalidadas = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.espera_total_s = 0.0
+        self.espera_max_s = 0.0
+        self.overflow_max = 0
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Pool padrão do engine assíncrono, medindo o tempo de espera por conexão."""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.timeouts += 1
+            raise
+        finally:
+            espera = time.perf_counter() - inicio
+            pool_stats.espera_total_s += espera
+            pool_stats.espera_max_s = max(pool_stats.espera_max_s, espera)
+
+
+def instrumentar(engine):
+    """Registra os eventos do pool do engine em `pool_stats`."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        pool_stats.conexoes_abertas += 1
+
+    @event.listens_for(sync_engine, "close")
+    def _close(dbapi_connection, connection_record):
+        pool_stats.conexoes_fechadas += 1
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _invalidate(dbapi_connection, connection_record, exception):
+        pool_stats.conexoes_invalidadas += 1
+
+    @event.listens_for(sync_engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_stats.checkouts += 1
+        pool_stats.overflow_max = max(pool_stats.overflow_max, sync_engine.pool.overflow())
+
+    @event.listens_for(sync_engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        pool_stats.checkins += 1
+
+
+def snapshot(engine) -> dict:
+    pool = engine.sync_engine.pool
+    s = pool_stats
+    return {
+        "tamanho": pool.size(),
+        "em_uso": pool.checkedout(),
+        "ociosas": pool.checkedin(),
+        "overflow_atual": max(pool.overflow(), 0),
+        "overflow_max": max(s.overflow_max, 0),
+        "checkouts": s.checkouts,
+        "checkins": s.checkins,
+        "timeouts": s.timeouts,
+        "espera_total_s": round(s.espera_total_s, 4),
+        "espera_media_s": (
+            round(s.espera_total_s / s.checkouts, 6) if s.checkouts else None
+        ),
+        "espera_max_s": round(s.espera_max_s, 4),
+        "conexoes_abertas": s.conexoes_abertas,
+        "conexoes_fechadas": s.conexoes_fechadas,
+        "conexoes_invalidadas": s.conexoes_invalidadas,
+    }
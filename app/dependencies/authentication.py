@@ -1,27 +1,35 @@
+import time
 from fastapi import Depends, HTTPException, status
 from typing import Annotated
 from jose import JWTError
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import db
 from app.services.auth import oauth2_scheme
-from app.services.jwt import SECRET_KEY, get_username_from_token
+from app.services.jwt import SECRET_KEY, decode_token
+from app.services.user_cache import user_cache
 from app.schemas.token import TokenData
+from app.schemas.user import UserResponse
 from app.models import User as UserModel  # ORM SQLAlchemy
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+    # Token já validado recentemente: dispensa decode e consulta ao banco
+    user = user_cache.get(token)
+    if user is not None:
+        return user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        username = get_username_from_token(token, SECRET_KEY)
+        claims = decode_token(token, SECRET_KEY)
+        username = claims.get("username")
         if username is None:
             raise credentials_exception
         token_data = TokenData(username=username)
-    except JWTError as jwt_exc:
+    except (JWTError, ValueError) as jwt_exc:
         raise credentials_exception from jwt_exc
 
     # Buscar usuário no banco com AsyncSession
@@ -33,11 +41,16 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
 
     if user is None:
         raise credentials_exception
+
+    user = UserResponse.model_validate(user, from_attributes=True)
+    # Não manter no cache além da expiração do token
+    ttl = claims["exp"] - time.time() if "exp" in claims else None
+    user_cache.set(token, user, ttl=ttl)
     return user
 
 
 async def get_current_active_user(
-    current_user: Annotated[UserModel, Depends(get_current_user)]
+    current_user: Annotated[UserResponse, Depends(get_current_user)]
 ):
     if current_user.disabled:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -9,47 +9,87 @@ from app.models import User
 from app.services.auth import authenticate_user
 from app.dependencies.authentication import get_current_active_user
 from app.routes.auth import router as auth_router
-
-app = FastAPI(
-    title="Celular",
-    version="0.1",
-    description="API para dados de celulares",
-    on_startup=[db.startup, create_first_user],
-    on_shutdown=[db.shutdown],
+from app.services.category_stats import atualizador_estatisticas
+from app.services.jobs import gerenciador_treinos
+from app.services.metrics import MetricsMiddleware
+from app.services.model_registry import (
+    carregar_modelo, iniciar_monitor_modelo, parar_monitor_modelo
 )
 
-origins = ["*"]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def create_app(bootstrap: bool = True) -> FastAPI:
+    """
+    Monta a aplicação.
 
-app.include_router(auth_router)
-app.include_router(
-    prefix="/api/v1/data",
-    router=__import__("app.routes.data", fromlist=["router"]).router,
-)
-app.include_router(
-    prefix="/api/v1/categories",
-    router=__import__("app.routes.categories", fromlist=["router"]).router,
-)
+    Com `bootstrap=False` o startup não cria schemas nem o primeiro usuário:
+    é o modo dos workers de `app.serve`, em que o bootstrap roda uma única
+    vez no processo principal antes do fork. Nesse modo os workers também
+    não monitoram o artefato: o processo principal os troca quando ele muda.
+    """
+    on_startup = [carregar_modelo]
+    if bootstrap:
+        on_startup = [db.startup, create_first_user, *on_startup, iniciar_monitor_modelo]
 
-app.include_router(
-    prefix="/api/v1/modelo",
-    router=__import__("app.routes.modelo", fromlist=["router"]).router,
-)
-@app.get("/users")
-async def list_users(session: AsyncSession = Depends(db.get_session)):
-    result = await session.execute(select(User))
-    users = result.scalars().all()
-    return users
+    app = FastAPI(
+        title="Celular",
+        version="0.1",
+        description="API para dados de celulares",
+        on_startup=on_startup,
+        on_shutdown=[
+            # O treino em andamento ainda grava sua execução no banco
+            gerenciador_treinos.shutdown,
+            # REFRESH pendente é cancelado antes de fechar o engine
+            atualizador_estatisticas.shutdown,
+            db.shutdown,
+            parar_monitor_modelo,
+        ],
+    )
+
+    origins = ["*"]
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(MetricsMiddleware)
+
+    app.include_router(auth_router)
+    app.include_router(
+        router=__import__("app.routes.metrics", fromlist=["router"]).router,
+    )
+    app.include_router(
+        prefix="/api/v1/data",
+        router=__import__("app.routes.data", fromlist=["router"]).router,
+    )
+    app.include_router(
+        prefix="/api/v1/categories",
+        router=__import__("app.routes.categories", fromlist=["router"]).router,
+    )
+
+    app.include_router(
+        prefix="/api/v1/modelo",
+        router=__import__("app.routes.modelo", fromlist=["router"]).router,
+    )
+    app.include_router(
+        prefix="/api/v1/status",
+        router=__import__("app.routes.status", fromlist=["router"]).router,
+    )
+
+    @app.get("/users")
+    async def list_users(session: AsyncSession = Depends(db.get_session)):
+        result = await session.execute(select(User))
+        users = result.scalars().all()
+        return users
+
+    # Teste de autenticação
+    @app.get("/me")
+    async def read_users_me(current_user: User = Depends(get_current_active_user)):
+        return current_user
+
+    return app
 
 
-# Teste de autenticação
-@app.get("/me")
-async def read_users_me(current_user: User = Depends(get_current_active_user)):
-    return current_user
+app = create_app()
@@ -1,3 +1,6 @@
 from app.models.auth import User, Role
 from app.models.base import Base
-from app.models.data import Category, Registration, Price
\ No newline at end of file
+from app.models.data import (
+    Category, Registration, RegistrationFeatures, Price, PriceDaily, CategoryPriceDaily,
+    TrainingRun, campo_data,
+)
\ No newline at end of file
@@ -1,8 +1,10 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional
 from sqlalchemy import (
-    String, TIMESTAMP, Integer, Float, JSON, ForeignKey, text, DateTime
+    String, TIMESTAMP, Boolean, Integer, Float, ForeignKey, Index, text, Date, DateTime,
+    Text, literal_column,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.models.base import Base
 
@@ -24,30 +26,154 @@ class Category(Base):
 # Registrations
 class Registration(Base):
     __tablename__ = "registrations"
-    __table_args__ = {"schema": "data"}
+    __table_args__ = (
+        # paginação por cursor em GET /api/v1/data
+        Index("ix_registrations_created_at_id", "created_at", "id"),
+        # filtros de GET /api/v1/data/search
+        Index("ix_registrations_category", "category"),
+        Index("ix_registrations_source", "source"),
+        Index(
+            "ix_registrations_data_gin", "data",
+            postgresql_using="gin", postgresql_ops={"data": "jsonb_path_ops"},
+        ),
+        {"schema": "data"},
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True, server_default=text("gen_random_uuid()"))
     name: Mapped[str] = mapped_column(String, unique=True)
     category: Mapped[str] = mapped_column(ForeignKey("data.categories.name"))
     release_date: Mapped[Optional[datetime]] = mapped_column(DateTime)
     status: Mapped[Optional[int]] = mapped_column(Integer)
-    data: Mapped[Optional[dict]] = mapped_column(JSON)
+    data: Mapped[Optional[dict]] = mapped_column(JSONB)
     url: Mapped[Optional[str]] = mapped_column(String)
     source: Mapped[Optional[str]] = mapped_column(String)
+    # sha256 do payload normalizado; upserts com o mesmo hash não escrevem nada
+    data_hash: Mapped[Optional[str]] = mapped_column(String)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=text("now()"))
     updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=text("now()"), onupdate=text("now()"))
 
     category_rel: Mapped["Category"] = relationship(back_populates="registrations")
     prices: Mapped[List["Price"]] = relationship(back_populates="registration_rel", cascade="all, delete-orphan")
+    features: Mapped[Optional["RegistrationFeatures"]] = relationship(back_populates="registration_rel", cascade="all, delete-orphan")
+
+
+# Features numéricas extraídas de Registration.data no momento da ingestão
+class RegistrationFeatures(Base):
+    __tablename__ = "registration_features"
+    __table_args__ = (
+        # faixas numéricas de GET /api/v1/data/search
+        Index("ix_registration_features_preco", "preco"),
+        Index("ix_registration_features_memoria_ram", "memoria_ram"),
+        Index("ix_registration_features_tela_tamanho", "tela_tamanho"),
+        {"schema": "data"},
+    )
+
+    registration_id: Mapped[str] = mapped_column(ForeignKey("data.registrations.id", ondelete="CASCADE"), primary_key=True)
+    preco: Mapped[Optional[float]] = mapped_column(Float)
+    peso: Mapped[Optional[float]] = mapped_column(Float)
+    bateria_carga: Mapped[Optional[float]] = mapped_column(Float)
+    tela_fps: Mapped[Optional[float]] = mapped_column(Float)
+    memoria_max: Mapped[Optional[float]] = mapped_column(Float)
+    memoria_ram: Mapped[Optional[float]] = mapped_column(Float)
+    camera_megapixel: Mapped[Optional[float]] = mapped_column(Float)
+    tela_densidade_pixels: Mapped[Optional[float]] = mapped_column(Float)
+    tela_tamanho: Mapped[Optional[float]] = mapped_column(Float)
+    tela_largura: Mapped[Optional[float]] = mapped_column(Float)
+    tela_altura: Mapped[Optional[float]] = mapped_column(Float)
+    disponibilidade: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    sistema_operacional: Mapped[Optional[str]] = mapped_column(String)
+    dimensoes: Mapped[Optional[str]] = mapped_column(String)
+    processador: Mapped[Optional[str]] = mapped_column(String)
+    chipset: Mapped[Optional[str]] = mapped_column(String)
+    gpu: Mapped[Optional[str]] = mapped_column(String)
+    tela_tipo: Mapped[Optional[str]] = mapped_column(String)
+    bateria_tipo: Mapped[Optional[str]] = mapped_column(String)
+    camera_resolucao: Mapped[Optional[str]] = mapped_column(String)
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=text("now()"), onupdate=text("now()"))
+
+    registration_rel: Mapped["Registration"] = relationship(back_populates="features")
+
+
+# Histórico de execuções de /train, com as medições de cada etapa
+class TrainingRun(Base):
+    __tablename__ = "training_runs"
+    __table_args__ = {"schema": "data"}
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    status: Mapped[str] = mapped_column(String)
+    etapa: Mapped[Optional[str]] = mapped_column(String)
+    parametros: Mapped[Optional[dict]] = mapped_column(JSONB)
+    # Job completo como devolvido por /train/jobs/{id}
+    resultado: Mapped[Optional[dict]] = mapped_column(JSONB)
+    linhas: Mapped[Optional[int]] = mapped_column(Integer)
+    features: Mapped[Optional[int]] = mapped_column(Integer)
+    etapas: Mapped[Optional[list]] = mapped_column(JSONB)
+    metricas: Mapped[Optional[dict]] = mapped_column(JSONB)
+    estimador: Mapped[Optional[str]] = mapped_column(String)
+    benchmark: Mapped[Optional[dict]] = mapped_column(JSONB)
+    versao_modelo: Mapped[Optional[str]] = mapped_column(String)
+    promovido: Mapped[Optional[bool]] = mapped_column(Boolean)
+    erro: Mapped[Optional[str]] = mapped_column(String)
+    iniciado_em: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), index=True)
+    finalizado_em: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    duracao_s: Mapped[Optional[float]] = mapped_column(Float)
+    criado_em: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    # Batimento do worker dono do job enquanto ele está ativo
+    atualizado_em: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+
+
+def campo_data(chave: str):
+    """
+    `data ->> 'chave'` com a chave literal no SQL. Com `data[chave].astext` a
+    chave vira bind parameter (`data ->> $1`), e o plano genérico do prepared
+    statement não casa com os índices de expressão abaixo. `chave` deve ser
+    uma constante do código, nunca um valor vindo da requisição.
+    """
+    return Registration.data.op("->>", return_type=Text)(
+        literal_column("'" + chave.replace("'", "''") + "'")
+    )
+
+
+# Índices de expressão sobre as chaves mais filtradas de Registration.data
+Index("ix_registrations_data_chipset", campo_data("chipset"))
+Index("ix_registrations_data_sistema_operacional", campo_data("sistema_operacional"))
 
 
 # Prices
 class Price(Base):
     __tablename__ = "prices"
-    __table_args__ = {"schema": "data"}
+    __table_args__ = (
+        Index("ix_prices_registration_id_created_at", "registration_id", "created_at"),
+        {"schema": "data"},
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True, server_default=text("gen_random_uuid()"))
     registration_id: Mapped[str] = mapped_column(ForeignKey("data.registrations.id"))
     price: Mapped[Optional[float]] = mapped_column(Float)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=text("now()"))
     registration_rel: Mapped["Registration"] = relationship(back_populates="prices")
+
+
+# Agregados diários de data.prices, mantidos incrementalmente a cada ingestão
+class PriceDaily(Base):
+    __tablename__ = "price_daily"
+    __table_args__ = {"schema": "data"}
+
+    registration_id: Mapped[str] = mapped_column(ForeignKey("data.registrations.id", ondelete="CASCADE"), primary_key=True)
+    dia: Mapped[date] = mapped_column(Date, primary_key=True)
+    quantidade: Mapped[int] = mapped_column(Integer)
+    soma: Mapped[float] = mapped_column(Float)
+    minimo: Mapped[float] = mapped_column(Float)
+    maximo: Mapped[float] = mapped_column(Float)
+
+
+class CategoryPriceDaily(Base):
+    __tablename__ = "category_price_daily"
+    __table_args__ = {"schema": "data"}
+
+    category: Mapped[str] = mapped_column(ForeignKey("data.categories.name", ondelete="CASCADE"), primary_key=True)
+    dia: Mapped[date] = mapped_column(Date, primary_key=True)
+    quantidade: Mapped[int] = mapped_column(Integer)
+    soma: Mapped[float] = mapped_column(Float)
+    minimo: Mapped[float] = mapped_column(Float)
+    maximo: Mapped[float] = mapped_column(Float)
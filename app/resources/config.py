@@ -13,6 +13,49 @@ class Settings(BaseSettings):
     first_email: str
     environment: str
 
+    # Servidor com vários workers (python -m app.serve)
+    servidor_host: str = "0.0.0.0"
+    servidor_porta: int = 8000
+    servidor_workers: int = 1
+
+    # Pool de conexões
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_pre_ping: bool = False
+    db_pool_recycle: int = -1
+    db_statement_cache_size: int = 100
+
+    # Modelo de preços
+    modelo_caminho: str = "modelo_precos_regressor.pkl"
+    modelo_mmap: bool = False
+    # Não carrega o modelo (nem sklearn) no startup, só na primeira predição
+    modelo_carga_preguicosa: bool = False
+    # Nível de compressão do joblib (0-9); ignorado com modelo_mmap
+    modelo_compressao: int = 3
+    # Intervalo para recarregar o artefato quando ele muda em disco (0 desativa);
+    # no app.serve, intervalo para trocar os workers
+    modelo_recarga_segundos: float = 10
+    treino_max_workers: int = 1
+    treino_tamanho_lote: int = 5000
+    predicao_cache_max_entradas: int = 10000
+
+    # Cache de usuários autenticados
+    auth_cache_ttl_segundos: float = 60
+    auth_cache_max_entradas: int = 10000
+
+    # Cache de respostas de leitura (categorias e registros)
+    response_cache_ttl_segundos: float = 30
+    response_cache_max_entradas: int = 1000
+    response_cache_max_bytes: int = 64 * 1024 * 1024
+
+    # Espera antes de atualizar data.category_stats após uma ingestão
+    estatisticas_atraso_segundos: float = 5
+
+    # Hashing de senhas (Argon2)
+    senha_max_workers: int = 2
+    senha_timeout_fila_segundos: float = 5
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
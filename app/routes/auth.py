@@ -1,9 +1,11 @@
+import time
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models import User
-from app.services.auth import authenticate_user
+from app.services.auth import authenticate_user, registrar_login
+from app.services.security import PasswordHashingBusy
 from app.services.jwt import create_access_token
 from app.schemas.token import Token
 from app.database import db
@@ -15,9 +17,22 @@ async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: AsyncSession = Depends(db.get_session),
 ):
+    inicio = time.perf_counter()
     result = await session.execute(select(User).where(User.username == form_data.username))
     user = result.scalars().first()
-    if not user or not authenticate_user({"hashed_password": user.hashed_password}, form_data.password):
+    try:
+        autenticado = bool(user) and await authenticate_user(
+            {"hashed_password": user.hashed_password}, form_data.password
+        )
+    except PasswordHashingBusy:
+        registrar_login(time.perf_counter() - inicio, "rejeitado")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de autenticação ocupado, tente novamente",
+            headers={"Retry-After": "1"},
+        )
+    registrar_login(time.perf_counter() - inicio, "sucesso" if autenticado else "falha")
+    if not autenticado:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -1,17 +1,21 @@
-import logging
-from typing import List, Annotated
+from datetime import date
+from typing import List, Annotated, Literal
 
-from fastapi import APIRouter, HTTPException, Response, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
 from starlette.status import HTTP_201_CREATED, HTTP_200_OK
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.db import get_session
-from app.models.data import Category as CategoryModel
+from app.models.data import Category as CategoryModel, CategoryPriceDaily
 from app.schemas.category import CategoryCreate, Category as CategorySchema
 from app.dependencies.authentication import get_current_active_user
 from app.schemas.user import User
+from app.services import response_cache
+from app.services.category_stats import listar_estatisticas
+from app.services.faixas import labels
+from app.services.prices import historico
 
 router = APIRouter()
 
@@ -25,14 +29,24 @@ router = APIRouter()
 )
 async def get_categories(
     _: Annotated[User, Depends(get_current_active_user)],
+    request: Request,
     session: AsyncSession = Depends(get_session),
     limit: int = 100,
 ) -> List[CategorySchema]:
-    """Pegar todas as categorias cadastradas no banco de dados."""
+    """
+    Pegar todas as categorias cadastradas no banco de dados.
+    Respostas ficam em cache (com ETag) até a próxima escrita de categorias.
+    """
+    cached = response_cache.cached("categories", request)
+    if cached is not None:
+        return cached
+
     query = select(CategoryModel).limit(limit)
     result = await session.execute(query)
     categories = result.scalars().all()
-    return [CategorySchema.from_orm(c) for c in categories]
+    return response_cache.store(
+        "categories", request, [CategorySchema.from_orm(c) for c in categories]
+    )
 
 
 @router.post(
@@ -66,7 +80,76 @@ async def create_category(
     except IntegrityError as e:
         await session.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    response_cache.invalidate("categories")
 
     await session.refresh(new_category)
 
-    return CategorySchema.from_orm(new_category)
\ No newline at end of file
+    return CategorySchema.from_orm(new_category)
+
+
+@router.get(
+    "/stats",
+    summary="Estatísticas de preço de todas as categorias",
+    status_code=HTTP_200_OK,
+)
+async def get_all_category_stats(
+    _: Annotated[User, Depends(get_current_active_user)],
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Quantidade de celulares, preço mínimo/mediano/máximo e distribuição
+    pelas faixas de preço da predição, por categoria. Lido da view
+    materializada `data.category_stats`, atualizada após cada ingestão.
+    """
+    return await listar_estatisticas(session)
+
+
+@router.get(
+    "/{name}/stats",
+    summary="Estatísticas de preço da categoria",
+    status_code=HTTP_200_OK,
+)
+async def get_category_stats(
+    _: Annotated[User, Depends(get_current_active_user)],
+    name: str,
+    session: AsyncSession = Depends(get_session),
+):
+    """Estatísticas de uma categoria (uma linha da view, pelo índice único)."""
+    name = name.strip().lower()
+    estatisticas = await listar_estatisticas(session, name)
+    if estatisticas:
+        return estatisticas[0]
+
+    existe = await session.scalar(select(CategoryModel.name).where(CategoryModel.name == name))
+    if existe is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Categoria não encontrada.",
+        )
+    # Categoria sem registros (ou ainda não incluída no último REFRESH)
+    return {
+        "category": name, "quantidade": 0, "com_preco": 0,
+        "minimo": None, "mediana": None, "maximo": None,
+        "faixas": {rotulo: 0 for rotulo in labels}, "atualizado_em": None,
+    }
+
+
+@router.get(
+    "/{name}/prices",
+    summary="Histórico de preços da categoria",
+    status_code=HTTP_200_OK,
+)
+async def category_price_history(
+    _: Annotated[User, Depends(get_current_active_user)],
+    name: str,
+    session: AsyncSession = Depends(get_session),
+    granularidade: Literal["dia", "semana"] = "dia",
+    inicio: date | None = None,
+    fim: date | None = None,
+):
+    """Histórico de preços da categoria, lido dos agregados diários."""
+    return await historico(
+        session, CategoryPriceDaily,
+        CategoryPriceDaily.category == name.strip().lower(),
+        granularidade, inicio, fim,
+    )
\ No newline at end of file
@@ -1,31 +1,214 @@
+import base64
 import logging
 import json
+from datetime import date, datetime
 import sqlalchemy
-import pandas as pd
-from fastapi import (APIRouter, HTTPException, Response, status, File, UploadFile, Depends)
+from fastapi import (APIRouter, HTTPException, Response, status, File, UploadFile, Depends, Body, Query, Request)
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
 from starlette import status
-from app.models import Registration, Category
-from app.database.db import get_session, AsyncSession
+from app.models import Registration, RegistrationFeatures, Category, PriceDaily, campo_data
+from app.database.db import get_session, AsyncSession, AsyncSessionLocal
 from app.schemas.register import Register
 from app.schemas.category import Category as CategorySchema
-from typing import List, Annotated
+from typing import List, Annotated, Literal
 from app.dependencies.authentication import get_current_active_user
 from app.schemas.user import User
+from app.services.ingest import (
+    salvar_features, inserir_lote, upsert_lote, para_linha,
+    ATUALIZADO, CRIADO, DUPLICADO, INALTERADO, INVALIDO,
+)
+from app.services import response_cache
+from app.services.category_stats import atualizador_estatisticas
+from app.services.prices import historico
 
 router = APIRouter()
 
+# Itens validados enviados ao banco por vez na ingestão em lote
+TAMANHO_LOTE_INGESTAO = 1000
+
+# Tamanho dos blocos lidos do cursor do servidor na exportação
+TAMANHO_BLOCO_EXPORTACAO = 1000
+
+
+def _encode_cursor(created_at: datetime, registration_id: str) -> str:
+    bruto = json.dumps([created_at.isoformat(), registration_id])
+    return base64.urlsafe_b64encode(bruto.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        created_at, registration_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(created_at), registration_id
+    except (ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido",
+        ) from e
+
+
+def _paginar(query, cursor: str | None):
+    """Ordem estável (created_at, id), seguindo o índice ix_registrations_created_at_id."""
+    query = query.order_by(Registration.created_at, Registration.id)
+    if cursor:
+        created_at, registration_id = _decode_cursor(cursor)
+        query = query.where(
+            sqlalchemy.tuple_(Registration.created_at, Registration.id)
+            > sqlalchemy.tuple_(created_at, registration_id)
+        )
+    return query
+
+
+def _json_default(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
 @router.get(
     "/",
     status_code=status.HTTP_200_OK,
 )
 async def get(
     _: Annotated[User, Depends(get_current_active_user)],
+    request: Request,
     session: AsyncSession = Depends(get_session),
-    limit: int = 3
+    limit: int = 3,
+    cursor: str | None = None,
 ):
-    query = sqlalchemy.select(Registration).limit(limit)
+    """
+    Lista os registros paginados por cursor. Quando há uma próxima página,
+    o cursor dela vem no header `X-Next-Cursor`.
+    Respostas ficam em cache (com ETag) até a próxima ingestão.
+    """
+    cached = response_cache.cached("data", request)
+    if cached is not None:
+        return cached
+
+    query = _paginar(sqlalchemy.select(Registration), cursor).limit(limit)
+    x = await session.execute(query)
+    registros = x.scalars().all()
+    headers = {}
+    if registros and len(registros) == limit:
+        ultimo = registros[-1]
+        headers["X-Next-Cursor"] = _encode_cursor(ultimo.created_at, ultimo.id)
+    return response_cache.store("data", request, registros, headers)
+
+
+@router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+)
+async def export(
+    _: Annotated[User, Depends(get_current_active_user)],
+    cursor: str | None = None,
+):
+    """
+    Exporta todos os registros (a partir de `cursor`, se informado) em NDJSON,
+    lidos em blocos de um cursor do lado do servidor.
+    """
+    query = _paginar(sqlalchemy.select(*Registration.__table__.columns), cursor)
+
+    async def linhas():
+        # Sessão própria: a do Depends é fechada antes do streaming começar
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(
+                query.execution_options(yield_per=TAMANHO_BLOCO_EXPORTACAO)
+            )
+            async for bloco in result.mappings().partitions():
+                yield "".join(
+                    json.dumps(dict(row), default=_json_default, ensure_ascii=False) + "\n"
+                    for row in bloco
+                )
+
+    return StreamingResponse(linhas(), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/search",
+    status_code=status.HTTP_200_OK,
+)
+async def search(
+    _: Annotated[User, Depends(get_current_active_user)],
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+    category: str | None = None,
+    source: str | None = None,
+    chipset: str | None = None,
+    sistema_operacional: str | None = None,
+    spec: Annotated[List[str] | None, Query(description="Filtro exato em data, no formato chave=valor")] = None,
+    ram_min: float | None = None,
+    ram_max: float | None = None,
+    tela_min: float | None = None,
+    tela_max: float | None = None,
+    preco_min: float | None = None,
+    preco_max: float | None = None,
+    limit: int = 100,
+    cursor: str | None = None,
+):
+    """
+    Filtra os registros no banco. Campos de texto usam os índices de
+    expressão/GIN sobre `data`; faixas numéricas usam as features
+    materializadas na ingestão. Paginação igual a `GET /`.
+    """
+    query = sqlalchemy.select(Registration)
+
+    if category:
+        query = query.where(Registration.category == category.strip().lower())
+    if source:
+        query = query.where(Registration.source == source.strip().lower())
+    if chipset:
+        query = query.where(campo_data("chipset") == chipset)
+    if sistema_operacional:
+        query = query.where(campo_data("sistema_operacional") == sistema_operacional)
+    for filtro in spec or []:
+        chave, sep, valor = filtro.partition("=")
+        if not sep or not chave:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Filtro inválido: {filtro!r} (use chave=valor)",
+            )
+        query = query.where(Registration.data.contains({chave: valor}))
+
+    faixas = [
+        (RegistrationFeatures.memoria_ram, ram_min, ram_max),
+        (RegistrationFeatures.tela_tamanho, tela_min, tela_max),
+        (RegistrationFeatures.preco, preco_min, preco_max),
+    ]
+    if any(minimo is not None or maximo is not None for _, minimo, maximo in faixas):
+        query = query.join(RegistrationFeatures)
+        for coluna, minimo, maximo in faixas:
+            if minimo is not None:
+                query = query.where(coluna >= minimo)
+            if maximo is not None:
+                query = query.where(coluna <= maximo)
+
+    query = _paginar(query, cursor).limit(limit)
     x = await session.execute(query)
-    return x.scalars().all()
+    registros = x.scalars().all()
+    if registros and len(registros) == limit:
+        ultimo = registros[-1]
+        response.headers["X-Next-Cursor"] = _encode_cursor(ultimo.created_at, ultimo.id)
+    return registros
+
+
+@router.get(
+    "/{registration_id}/prices",
+    status_code=status.HTTP_200_OK,
+)
+async def price_history(
+    _: Annotated[User, Depends(get_current_active_user)],
+    registration_id: str,
+    session: AsyncSession = Depends(get_session),
+    granularidade: Literal["dia", "semana"] = "dia",
+    inicio: date | None = None,
+    fim: date | None = None,
+):
+    """Histórico de preços do registro, lido dos agregados diários."""
+    return await historico(
+        session, PriceDaily, PriceDaily.registration_id == registration_id,
+        granularidade, inicio, fim,
+    )
 
 
 @router.post(
@@ -35,8 +218,26 @@ async def get(
 async def create(
     # _: Annotated[User, Depends(get_current_active_user)],
     session: AsyncSession = Depends(get_session),
-    register: Register = None
+    register: Register = None,
+    upsert: bool = False,
 ):
+    """
+    Cria o registro; nomes existentes são rejeitados. Com `upsert=true`,
+    um nome existente é atualizado apenas se o conteúdo mudou (hash do
+    payload), e só então as features e um novo preço são gravados.
+    """
+    if upsert:
+        status_registro = (await upsert_lote(session, [register]))[register.name]
+        await session.commit()
+        if status_registro != INALTERADO:
+            response_cache.invalidate("data", "categories")
+            atualizador_estatisticas.agendar()
+        return JSONResponse(
+            {"name": register.name, "status": status_registro},
+            status_code=(
+                status.HTTP_201_CREATED if status_registro == CRIADO else status.HTTP_200_OK
+            ),
+        )
 
     logging.info("Dados recebidos, verificando se já existe na base de dados...")
 
@@ -80,10 +281,130 @@ async def create(
 
     logging.info("Registro não existe na base de dados, inserindo...")
 
-    _ = await session.execute(
+    registration_id = await session.scalar(
         sqlalchemy.insert(Registration).values(
-            **register.model_dump()
-    ))
+            **para_linha(register)
+    ).returning(Registration.id))
+
+    # Features numéricas e preço calculados uma única vez, na ingestão
+    await salvar_features(
+        session, [(registration_id, register.category, register.data.model_dump())]
+    )
     await session.commit()
+    response_cache.invalidate("data", "categories")
+    atualizador_estatisticas.agendar()
     logging.info("Registro inserido com sucesso")
     return Response(status_code=status.HTTP_201_CREATED)
+
+
+async def _ingerir_itens(session: AsyncSession, itens, upsert: bool = False):
+    """
+    Valida e insere os itens `(indice, payload | erro)` em lotes, em uma
+    única transação. Nomes repetidos dentro do envio contam como duplicados.
+    Com `upsert`, nomes existentes são atualizados se o conteúdo mudou.
+    """
+    gravar = upsert_lote if upsert else inserir_lote
+    resultados = []
+    vistos = set()
+    lote = []
+
+    async def enviar():
+        status_por_nome = await gravar(session, [r for _, r in lote])
+        for indice, register in lote:
+            resultados.append({
+                "indice": indice,
+                "name": register.name,
+                "status": status_por_nome[register.name],
+            })
+        lote.clear()
+
+    async for indice, payload, erro in itens:
+        if erro is None:
+            try:
+                register = Register.model_validate(payload)
+            except ValidationError as e:
+                erro = str(e)
+        if erro is not None:
+            resultados.append({"indice": indice, "status": INVALIDO, "erro": erro})
+            continue
+        if register.name in vistos:
+            resultados.append({"indice": indice, "name": register.name, "status": DUPLICADO})
+            continue
+        vistos.add(register.name)
+        lote.append((indice, register))
+        if len(lote) >= TAMANHO_LOTE_INGESTAO:
+            await enviar()
+    if lote:
+        await enviar()
+    await session.commit()
+
+    resultados.sort(key=lambda r: r["indice"])
+    resumo = {}
+    for r in resultados:
+        resumo[r["status"]] = resumo.get(r["status"], 0) + 1
+    if resumo.get(CRIADO) or resumo.get(ATUALIZADO):
+        response_cache.invalidate("data", "categories")
+        atualizador_estatisticas.agendar()
+    return {"resumo": resumo, "itens": resultados}
+
+
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_200_OK,
+)
+async def create_bulk(
+    _: Annotated[User, Depends(get_current_active_user)],
+    session: AsyncSession = Depends(get_session),
+    registros: List[dict] = Body(...),
+    upsert: bool = False,
+):
+    """
+    Ingestão em lote de uma lista de `Register`, com resultado por item.
+    Com `upsert=true`, registros existentes com conteúdo diferente são
+    atualizados e os idênticos não geram escrita.
+    """
+    async def itens():
+        for indice, payload in enumerate(registros):
+            yield indice, payload, None
+
+    return await _ingerir_itens(session, itens(), upsert)
+
+
+@router.post(
+    "/bulk/ndjson",
+    status_code=status.HTTP_200_OK,
+)
+async def create_bulk_ndjson(
+    _: Annotated[User, Depends(get_current_active_user)],
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    upsert: bool = False,
+):
+    """
+    Ingestão em lote a partir de um corpo NDJSON (um `Register` por linha),
+    lido em streaming e enviado ao banco a cada `TAMANHO_LOTE_INGESTAO` itens.
+    """
+    async def linhas():
+        resto = b""
+        async for bloco in request.stream():
+            resto += bloco
+            *completas, resto = resto.split(b"\n")
+            for linha in completas:
+                yield linha
+        yield resto
+
+    async def itens():
+        indice = 0
+        async for linha in linhas():
+            if not linha.strip():
+                continue
+            # JSONDecodeError e UnicodeDecodeError (linha fora de UTF-8)
+            # são ValueError: o item conta como inválido, sem derrubar o envio
+            try:
+                payload, erro = json.loads(linha), None
+            except ValueError as e:
+                payload, erro = None, f"JSON inválido: {e}"
+            yield indice, payload, erro
+            indice += 1
+
+    return await _ingerir_itens(session, itens(), upsert)
@@ -0,0 +1,55 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.database import db
+from app.database.pool import snapshot
+from app.services import metrics
+from app.services.auth import login_metrics
+from app.services.model_registry import registry
+from app.services.prediction_cache import prediction_cache
+from app.services.response_cache import response_cache
+from app.services.security import password_hasher
+from app.services.user_cache import user_cache
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _estatisticas() -> list[str]:
+    """As mesmas estatísticas de /api/v1/status, como gauges."""
+    linhas = []
+
+    for chave, valor in snapshot(db.engine).items():
+        linhas += metrics.gauge(f"db_pool_{chave}", f"Pool de conexões: {chave}", [({}, valor)])
+
+    caches = {"auth": user_cache, "respostas": response_cache, "predicoes": prediction_cache}
+    stats = {nome: cache.stats() for nome, cache in caches.items()}
+    for chave in ("entradas", "hits", "misses", "bytes"):
+        linhas += metrics.gauge(
+            f"cache_{chave}", f"Caches em memória: {chave}",
+            [({"cache": nome}, s.get(chave)) for nome, s in stats.items()],
+        )
+
+    hashing = password_hasher.stats()
+    for chave in ("fila", "fila_max", "em_execucao", "operacoes", "rejeitadas"):
+        linhas += metrics.gauge(
+            f"senha_hash_{chave}", f"Hashing de senhas: {chave}", [({}, hashing[chave])]
+        )
+
+    for chave, valor in login_metrics.items():
+        linhas += metrics.gauge(f"login_{chave}", f"Logins: {chave}", [({}, valor)])
+
+    versao = registry.versao_ativa
+    linhas += metrics.gauge(
+        "modelo_carregado", "Modelo de preços carregado (1) por versão",
+        [({"versao": versao}, 1)] if versao else [({}, 0)],
+    )
+    return linhas
+
+
+@router.get("/metrics", include_in_schema=False)
+async def exportar_metricas():
+    """Métricas do processo no formato texto do Prometheus."""
+    texto = "\n".join(metrics.exportar() + _estatisticas()) + "\n"
+    return PlainTextResponse(texto, media_type=CONTENT_TYPE)
@@ -1,35 +1,27 @@
-import logging
 import json
-import sqlalchemy
+import shutil
+import tempfile
+import time
 import pandas as pd
-from fastapi import (APIRouter, HTTPException, Response,
-                     status, File, UploadFile, Depends)
-from pydantic import BaseModel
+from fastapi import (APIRouter, HTTPException,
+                     status, File, UploadFile, Depends, Query)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
 from starlette import status
-from app.models import Registration, Category
 from app.database.db import get_session, AsyncSession
-from typing import List, Annotated
+from typing import List, Annotated, Literal
 from app.dependencies.authentication import get_current_active_user
 from app.schemas.user import User
-import joblib
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.impute import SimpleImputer
-from sklearn.pipeline import Pipeline
-from sklearn.compose import ColumnTransformer
-from sklearn.model_selection import GridSearchCV
-from sklearn.metrics import classification_report
-from sklearn.metrics import confusion_matrix
-from sklearn.metrics import ConfusionMatrixDisplay
-import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.impute import SimpleImputer
-from sklearn.compose import ColumnTransformer
-from sklearn.ensemble import RandomForestRegressor
+from app.services import metrics
+from app.services.faixas import bins, faixa_preco, labels
+from app.services.features import preparar_features
+from app.services.jobs import (
+    TreinoEmAndamento, gerenciador_treinos, listar_execucoes, listar_jobs, obter_job,
+)
+from app.services.model_registry import modelo_ativo, registry
+from app.services.prediction_cache import chave_predicao, prediction_cache
+from dataclasses import asdict
 
 router = APIRouter()
 
@@ -102,9 +94,98 @@ class Celular(BaseModel):
                     "tela_fps": 60.0
             },
                 ]}
-# Faixas de preço
-bins = [0, 1000, 2000, 3000, 4000, 5000, 10000]
-labels = ["Muito Barato", "Barato", "Médio", "Caro", "Muito Caro", "Luxo"]
+# Quantidade de linhas pontuadas por chamada a model.predict no modo em lote
+TAMANHO_LOTE = 5000
+
+
+async def _modelo_ativo():
+    # Referência única: o modelo não muda no meio da predição
+    ativo = await modelo_ativo()
+    if ativo is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Modelo não carregado; treine o modelo via /train",
+        )
+    return ativo
+
+
+def _prever_lote(model, registros: List[dict]) -> List[dict]:
+    """Monta um único DataFrame, chama predict uma vez e aplica um único pd.cut."""
+    inicio = time.perf_counter()
+    # Mesmas transformações do treino (remove colunas de preço do payload)
+    df = preparar_features(pd.DataFrame(registros))
+
+    # Previsão do preço exato
+    precos = model.predict(df)
+    metrics.predicoes_duracao.observar(time.perf_counter() - inicio, "pipeline")
+    metrics.predicoes_linhas.inc("pipeline", valor=len(registros))
+
+    # Converter para faixa
+    faixas = pd.cut(precos, bins=bins, labels=labels)
+
+    return [
+        {
+            "preco_previsto": round(float(preco), 2),
+            "faixa_preco": None if pd.isna(faixa) else faixa,
+        }
+        for preco, faixa in zip(precos, faixas)
+    ]
+
+
+def _linhas_ndjson(ativo, lotes):
+    """Pontua cada lote e devolve as respostas como linhas NDJSON."""
+    versao = ativo.versao.versao
+    for lote in lotes:
+        validos = [(i, c) for i, c, erro in lote if erro is None]
+        resultados = iter(
+            _prever_lote(ativo.modelo, [c.model_dump() for _, c in validos])
+            if validos else []
+        )
+        for indice, _, erro in lote:
+            if erro is None:
+                linha = {"indice": indice, **next(resultados), "versao_modelo": versao}
+            else:
+                linha = {"indice": indice, "erro": erro}
+            yield json.dumps(linha, ensure_ascii=False) + "\n"
+
+
+def _prever_linha(ativo, payload: dict) -> dict:
+    """Usa o preditor compilado do modelo ativo; sem ele, o Pipeline."""
+    if ativo.preditor is None:
+        return _prever_lote(ativo.modelo, [payload])[0]
+    inicio = time.perf_counter()
+    preco = ativo.preditor.prever(payload)
+    metrics.predicoes_duracao.observar(time.perf_counter() - inicio, "compilado")
+    metrics.predicoes_linhas.inc("compilado")
+    return {"preco_previsto": round(preco, 2), "faixa_preco": faixa_preco(preco)}
+
+
+def _agrupar(itens, tamanho: int = TAMANHO_LOTE):
+    lote = []
+    for item in itens:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _ler_ndjson(arquivo):
+    """Lê o arquivo linha a linha, validando cada uma como `Celular`."""
+    try:
+        indice = 0
+        for linha in arquivo:
+            if not linha.strip():
+                continue
+            try:
+                yield indice, Celular.model_validate_json(linha), None
+            except ValidationError as e:
+                yield indice, None, str(e)
+            indice += 1
+    finally:
+        arquivo.close()
+
 
 @router.post("/predict_hybrid", status_code=status.HTTP_200_OK)
 async def prever_hibrido(
@@ -112,176 +193,146 @@ async def prever_hibrido(
     celular: Celular,
     session: AsyncSession = Depends(get_session)
 ):
+    ativo = await _modelo_ativo()
+    versao = ativo.versao.versao
+    payload = celular.model_dump()
+
+    # Configurações repetidas não passam de novo pela floresta
+    chave = chave_predicao(payload, versao)
+    resultado = prediction_cache.get(chave)
+    if resultado is not None:
+        return {**resultado, "versao_modelo": versao}
+
     try:
-        model = joblib.load("modelo_precos_regressor.pkl")
+        resultado = _prever_linha(ativo, payload)
+        prediction_cache.set(chave, resultado)
+        return {**resultado, "versao_modelo": versao}
+
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao carregar o modelo: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao fazer a predição: {e}")
 
-    try:
-        df = pd.DataFrame([celular.model_dump()])
 
-        # remover colunas de preço do payload
-        for col in ["preco", "preco_medio", "precos"]:
-            if col in df.columns:
-                df = df.drop(columns=[col])
+@router.post("/predict_batch", status_code=status.HTTP_200_OK)
+async def prever_lote(
+    _: Annotated[User, Depends(get_current_active_user)],
+    celulares: List[Celular],
+):
+    """
+    Pontua uma lista de celulares e devolve uma linha NDJSON por item,
+    na mesma ordem da entrada.
+    """
+    ativo = await _modelo_ativo()
+    lotes = _agrupar((i, c, None) for i, c in enumerate(celulares))
+    return StreamingResponse(
+        _linhas_ndjson(ativo, lotes), media_type="application/x-ndjson"
+    )
 
-        # Previsão do preço exato
-        preco_previsto = model.predict(df)[0]
 
-        # Converter para faixa
-        faixa_preco = pd.cut([preco_previsto], bins=bins, labels=labels)[0]
+@router.post("/predict_batch/ndjson", status_code=status.HTTP_200_OK)
+async def prever_lote_ndjson(
+    _: Annotated[User, Depends(get_current_active_user)],
+    arquivo: UploadFile = File(...),
+):
+    """
+    Pontua um arquivo NDJSON (um `Celular` por linha). O arquivo é lido e
+    respondido em lotes de `TAMANHO_LOTE`, mantendo a memória constante.
+    Linhas inválidas geram uma linha com o campo "erro".
+    """
+    ativo = await _modelo_ativo()
 
-        return {
-            "preco_previsto": round(preco_previsto, 2),
-            "faixa_preco": faixa_preco
-        }
+    # O UploadFile é fechado ao fim do handler, antes do streaming;
+    # copiamos para um temporário próprio que o gerador fecha ao terminar
+    copia = tempfile.TemporaryFile(mode="w+b")
+    await run_in_threadpool(shutil.copyfileobj, arquivo.file, copia)
+    copia.seek(0)
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao fazer a predição: {e}")
+    lotes = _agrupar(_ler_ndjson(copia))
+    return StreamingResponse(
+        _linhas_ndjson(ativo, lotes), media_type="application/x-ndjson"
+    )
 
-@router.post("/train", status_code=status.HTTP_200_OK)
+@router.post("/train", status_code=status.HTTP_202_ACCEPTED)
 async def treinar_modelo(
     _: Annotated[User, Depends(get_current_active_user)],
-    session: AsyncSession = Depends(get_session)
+    busca: bool = False,
+    orcamento_segundos: float = Query(300, gt=0),
+    estimador: Literal["floresta", "floresta_compacta", "hist_gb"] = "floresta",
 ):
-    from pydantic import BaseModel, ConfigDict
-
-    class RegistrationData(BaseModel):
-        data: dict | None = None
-        model_config = ConfigDict(from_attributes=True)
+    """
+    Agenda o treino em um processo separado e retorna o job.
+    Se já houver um treino em andamento (em qualquer worker) com os mesmos
+    parâmetros, o mesmo job é retornado. Com parâmetros diferentes
+    (`estimador`, `busca`, `orcamento_segundos`), responde 409 com o id do
+    job ativo: o novo treino não é agendado.
 
-    # Buscar registros
-    query = sqlalchemy.select(Registration)
-    result = await session.execute(query)
-    records = result.scalars().all()
-    records_data = [RegistrationData.from_orm(r).data for r in records if r.data]
+    Com `busca=true`, faz busca aleatória de hiperparâmetros com validação
+    cruzada dentro de `orcamento_segundos` (fit final incluído), e só promove o modelo vencedor
+    se ele superar o atual no conjunto de teste.
 
-    if not records_data:
+    `estimador` escolhe o modelo: `floresta` (padrão), `floresta_compacta`
+    (artefato e latência menores) ou `hist_gb` (gradient boosting por
+    histogramas). O resultado traz o benchmark de tamanho, carga e latência.
+    """
+    parametros = {"estimador": estimador}
+    if busca:
+        parametros.update({"busca": True, "orcamento_s": orcamento_segundos})
+    try:
+        job, criado = await gerenciador_treinos.submeter(**parametros)
+    except TreinoEmAndamento as e:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Não há dados suficientes para treinar o modelo"
-        )
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "mensagem": "Há um treino em andamento com outros parâmetros",
+                "job_id": e.job.id,
+                "parametros": e.job.parametros,
+            },
+        ) from e
+    return {**job.como_dict(), "novo": criado}
 
-    df = pd.DataFrame(records_data)
 
-    # Extrair preço
-    def extrair_preco(row):
-        if pd.notna(row.get("preco_medio")):
-            return float(row["preco_medio"])
-        if isinstance(row.get("precos"), list) and row["precos"]:
-            preco_str = row["precos"][0].replace("R$", "").replace(".", "").replace(",", ".").strip()
-            try:
-                return float(preco_str)
-            except:
-                return None
-        return None
-
-    df["preco"] = df.apply(extrair_preco, axis=1)
-    df = df.dropna(subset=["preco"])
-    df["preco"] = df["preco"].astype(float)
-
-    # Remover colunas irrelevantes
-    df = df.drop([
-        "id", "name", "category", "release_date", "status",
-        "url", "source", "created_at", "updated_at",
-        "preco_medio", "precos", "memoria_expansivel", "resistencia_agua"
-    ], axis=1, errors="ignore")
-    
-    # Tratando colunas numéricas com regex
-    def extrair_numero(text):
-        import re
-        if pd.isna(text):
-            return None
-        match = re.search(r"[\d,.]+", text)
-        if match:
-            num_str = match.group(0).replace(",", ".")
-            try:
-                return float(num_str)
-            except:
-                return None
-        return None
-
-    numeric_cols = ["peso", "bateria_carga", "tela_fps", "memoria_max", "camera_megapixel", "tela_densidade_pixels"]
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = df[col].apply(extrair_numero)
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            df[col] = df[col].astype(float)
-            
-    import re
-    # Separando tela_resolucao em largura e altura
-    if "tela_resolucao" in df.columns:
-        def split_resolution(res):
-            if pd.isna(res):
-                return None, None
-            # formato: '3200 x 2400 pixel'
-            # pegar apenas a parte antes de 'pixel'
-            res = res.split("pixel")[0].strip()
-            # dividir por 'x' ou 'X'
-            parts = re.split(r'[xX]', res)
-            if len(parts) == 2:
-                try:
-                    width = int(parts[0].strip())
-                    height = int(parts[1].strip())
-                    return width, height
-                except:
-                    return None, None
-            return None, None
-        
-        df[["tela_largura", "tela_altura"]] = df["tela_resolucao"].apply(
-            lambda x: pd.Series(split_resolution(x))
-        )
-        df = df.drop("tela_resolucao", axis=1)
-
-    # 
-    # Preencher valores ausentes
-    categorical_cols = df.select_dtypes(include=["object", "category"]).columns.tolist()
-    for col in df.select_dtypes(include=["category"]).columns:
-        df[col] = df[col].cat.add_categories("Desconhecido")
-    if categorical_cols:
-        df[categorical_cols] = df[categorical_cols].fillna("Desconhecido")
-
-    # Calculando disponibilidade (idade do modelo em meses)
-    df["disponibilidade"] = (pd.to_datetime("now") - pd.to_datetime(df["disponibilidade"])).dt.days // 30
-
-    # Separar features e target
-    X = df.drop("preco", axis=1)
-    y = df["preco"]
-
-    # Split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42
-    )
+@router.get("/train/jobs", status_code=status.HTTP_200_OK)
+async def listar_treinos(
+    _: Annotated[User, Depends(get_current_active_user)],
+    session: AsyncSession = Depends(get_session),
+    limit: int = 50,
+):
+    """Lista os treinos mais recentes, de todos os workers."""
+    return [job.como_dict() for job in await listar_jobs(session, limit)]
 
-    # Identificar colunas
-    numeric_features = X.select_dtypes(include=["int64", "float64"]).columns.tolist()
-    categorical_features = X.select_dtypes(include=["object", "category"]).columns.tolist()
-
-    # Transformadores
-    numeric_transformer = SimpleImputer(strategy="median")
-    categorical_transformer = Pipeline(steps=[
-        ("imputer", SimpleImputer(strategy="most_frequent")),
-        ("encoder", OneHotEncoder(handle_unknown="ignore"))
-    ])
-
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ("num", numeric_transformer, numeric_features),
-            ("cat", categorical_transformer, categorical_features)
-        ]
-    )
 
-    # Pipeline do regressor
-    regressor = Pipeline(steps=[
-        ("preprocessor", preprocessor),
-        ("model", RandomForestRegressor(n_estimators=200, random_state=42))
-    ])
+@router.get("/train/runs", status_code=status.HTTP_200_OK)
+async def listar_execucoes_treino(
+    _: Annotated[User, Depends(get_current_active_user)],
+    session: AsyncSession = Depends(get_session),
+    limit: int = 50,
+):
+    """Execuções de treino gravadas, com tempo, CPU e memória de cada etapa."""
+    return await listar_execucoes(session, limit)
+
 
-    # Treinar
-    regressor.fit(X_train, y_train)
+@router.get("/train/jobs/{job_id}", status_code=status.HTTP_200_OK)
+async def status_treino(
+    _: Annotated[User, Depends(get_current_active_user)],
+    job_id: str,
+    session: AsyncSession = Depends(get_session),
+):
+    """Status, etapa, duração e resultado de um treino."""
+    job = await obter_job(session, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Treino não encontrado",
+        )
+    return job.como_dict()
 
-    # Salvar modelo
-    joblib.dump(regressor, "modelo_precos_regressor.pkl")
-    logging.info("Modelo de regressão salvo como modelo_precos_regressor.pkl")
 
-    return {"message": "Modelo treinado com sucesso"}
\ No newline at end of file
+@router.get("/versions", status_code=status.HTTP_200_OK)
+async def listar_versoes(
+    _: Annotated[User, Depends(get_current_active_user)],
+):
+    """Lista as versões carregadas, com tempo de carga e memória ocupada."""
+    ativa = registry.versao_ativa
+    return [
+        {**asdict(v), "ativa": v.versao == ativa}
+        for v in registry.versoes()
+    ]
\ No newline at end of file
@@ -0,0 +1,80 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from starlette import status
+
+from app.database import db
+from app.database.pool import snapshot
+from app.dependencies.authentication import get_current_active_user
+from app.schemas.user import User
+from app.services.auth import login_metrics
+from app.services.prediction_cache import prediction_cache
+from app.services.response_cache import response_cache
+from app.services.security import password_hasher
+from app.services.user_cache import user_cache
+
+router = APIRouter()
+
+
+@router.get(
+    "/auth-cache",
+    summary="Estatísticas do cache de usuários autenticados",
+    status_code=status.HTTP_200_OK,
+)
+async def auth_cache_stats(
+    _: Annotated[User, Depends(get_current_active_user)],
+):
+    return user_cache.stats()
+
+
+@router.get(
+    "/password-hashing",
+    summary="Fila do hashing de senhas e latência de login",
+    status_code=status.HTTP_200_OK,
+)
+async def password_hashing_stats(
+    _: Annotated[User, Depends(get_current_active_user)],
+):
+    total = login_metrics["total"]
+    return {
+        "hashing": password_hasher.stats(),
+        "login": {
+            **login_metrics,
+            "tempo_medio_s": (
+                round(login_metrics["tempo_total_s"] / total, 4) if total else None
+            ),
+        },
+    }
+
+
+@router.get(
+    "/db-pool",
+    summary="Uso do pool de conexões do banco",
+    status_code=status.HTTP_200_OK,
+)
+async def db_pool_stats(
+    _: Annotated[User, Depends(get_current_active_user)],
+):
+    return snapshot(db.engine)
+
+
+@router.get(
+    "/response-cache",
+    summary="Estatísticas do cache de respostas de leitura",
+    status_code=status.HTTP_200_OK,
+)
+async def response_cache_stats(
+    _: Annotated[User, Depends(get_current_active_user)],
+):
+    return response_cache.stats()
+
+
+@router.get(
+    "/prediction-cache",
+    summary="Estatísticas do cache de predições",
+    status_code=status.HTTP_200_OK,
+)
+async def prediction_cache_stats(
+    _: Annotated[User, Depends(get_current_active_user)],
+):
+    return prediction_cache.stats()
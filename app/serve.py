@@ -0,0 +1,152 @@
+"""
+Servidor com vários workers compartilhando uma única cópia do modelo.
+
+    python -m app.serve
+
+O processo principal faz o bootstrap uma única vez (schemas, migrações e
+primeiro usuário), carrega o modelo, abre o socket e só então cria os
+workers com fork. O modelo carregado no processo principal é compartilhado
+por copy-on-write; no RSS de cada worker essas páginas aparecem inteiras
+(use o PSS para ver a divisão). O `modelo_mmap` não ajuda com florestas: ao
+desserializar, o sklearn copia os nós das árvores para memória privada.
+
+Uma carga feita dentro de um worker é privada dele. Por isso os workers
+não recarregam o modelo sozinhos: quando o artefato muda em disco (um
+treino em qualquer worker), o processo principal o carrega e troca todos
+os workers ativos por novos forks, que voltam a compartilhar a cópia. Workers que
+caem são recriados.
+"""
+import asyncio
+import gc
+import logging
+import os
+import signal
+import time
+
+import uvicorn
+
+from app.database import db
+from app.database.first_migration import create_first_user
+from app.main import create_app
+from app.resources.config import settings
+from app.services.model_registry import carregar_modelo, registry
+from app.services.security import password_hasher
+from app.workers import ConjuntoWorkers
+
+# Intervalo do laço de supervisão dos workers
+INTERVALO_SUPERVISAO_S = 1.0
+
+
+async def bootstrap():
+    await db.startup()
+    await create_first_user()
+    # Os workers não podem herdar conexões, threads nem o event loop
+    await db.engine.dispose()
+    password_hasher.shutdown()
+    await carregar_modelo()
+
+
+def _mtime_artefato() -> int | None:
+    try:
+        return os.stat(registry.caminho).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _executar_worker(config: uvicorn.Config, sock):
+    # O uvicorn instala seus próprios handlers de encerramento
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(bootstrap())
+
+    config = uvicorn.Config(
+        create_app(bootstrap=False),
+        host=settings.servidor_host,
+        port=settings.servidor_porta,
+    )
+    sock = config.bind_socket()
+
+    # Objetos já criados (modelo incluído) saem do GC: a coleta nos workers
+    # não toca essas páginas e elas continuam compartilhadas
+    gc.freeze()
+
+    encerrando = False
+
+    def criar_worker() -> int:
+        pid = os.fork()
+        if pid == 0:
+            codigo = 1
+            try:
+                _executar_worker(config, sock)
+                codigo = 0
+            finally:
+                os._exit(codigo)
+        logging.info("Worker %s iniciado", pid)
+        return pid
+
+    conjunto = ConjuntoWorkers(criar_worker, os.kill)
+
+    def trocar_workers():
+        """Carrega o novo artefato aqui e troca os workers ativos por novos forks."""
+        if not settings.modelo_carga_preguicosa:
+            registry.carregar()
+            gc.freeze()
+        conjunto.trocar()
+        logging.info("Workers trocados para o modelo %s", registry.versao_ativa)
+
+    def encerrar(signum, frame):
+        nonlocal encerrando
+        encerrando = True
+        conjunto.encerrar()
+
+    signal.signal(signal.SIGINT, encerrar)
+    signal.signal(signal.SIGTERM, encerrar)
+
+    for _ in range(max(settings.servidor_workers, 1)):
+        conjunto.iniciar()
+
+    recarga_s = settings.modelo_recarga_segundos
+    mtime = _mtime_artefato()
+    proxima_verificacao = time.monotonic() + recarga_s
+
+    while conjunto.workers:
+        try:
+            pid, estado = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+
+        if pid == 0:
+            time.sleep(INTERVALO_SUPERVISAO_S)
+            if recarga_s > 0 and not encerrando and time.monotonic() >= proxima_verificacao:
+                proxima_verificacao = time.monotonic() + recarga_s
+                atual = _mtime_artefato()
+                if atual is not None and atual != mtime:
+                    try:
+                        trocar_workers()
+                        mtime = atual
+                    except Exception:
+                        # mtime antigo: tenta de novo na próxima verificação
+                        logging.exception("Falha ao carregar o novo modelo de %s", registry.caminho)
+            continue
+
+        if not conjunto.terminou(pid):
+            continue
+        if not encerrando:
+            logging.warning(
+                "Worker %s terminou (código %s); reiniciando",
+                pid, os.waitstatus_to_exitcode(estado),
+            )
+            time.sleep(1)
+            if not encerrando:
+                conjunto.iniciar()
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,26 @@
 from fastapi.security import OAuth2PasswordBearer
-from app.services.security import verify_password
+from app.services.security import password_hasher
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/token")
 
+# Latência de login (inclui a espera na fila do hashing)
+login_metrics = {"total": 0, "falhas": 0, "rejeitados": 0, "tempo_total_s": 0.0, "tempo_max_s": 0.0}
 
-def authenticate_user(user_from_db, password: str):
+
+def registrar_login(duracao_s: float, resultado: str):
+    """`resultado`: "sucesso", "falha" ou "rejeitado" (fila cheia)."""
+    login_metrics["total"] += 1
+    if resultado == "falha":
+        login_metrics["falhas"] += 1
+    elif resultado == "rejeitado":
+        login_metrics["rejeitados"] += 1
+    login_metrics["tempo_total_s"] += duracao_s
+    login_metrics["tempo_max_s"] = max(login_metrics["tempo_max_s"], duracao_s)
+
+
+async def authenticate_user(user_from_db, password: str):
     if not user_from_db:
         return False
-    if not verify_password(password, user_from_db.get("hashed_password", "")):
+    if not await password_hasher.verify(password, user_from_db.get("hashed_password", "")):
         return False
     return user_from_db
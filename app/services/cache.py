@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Cache LRU limitado por número de entradas, com expiração por tempo.
+
+    `ttl=None` desativa a expiração (LRU puro). Com `sizeof`, o total de
+    bytes das entradas é medido, e limitado a `max_bytes` quando informado.
+    Seguro para uso a partir de threads; contadores de acerto e falha ficam
+    disponíveis em `stats()`.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float | None = None,
+        max_bytes: int | None = None,
+        sizeof=None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._mede_bytes = sizeof is not None
+        self.sizeof = sizeof or (lambda valor: 0)
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._dados: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remover(self, chave):
+        valor, _ = self._dados.pop(chave)
+        self.bytes -= self.sizeof(valor)
+
+    def get(self, chave, default=None):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is not None:
+                valor, expira_em = item
+                if expira_em is None or expira_em > time.monotonic():
+                    self._dados.move_to_end(chave)
+                    self.hits += 1
+                    return valor
+                self._remover(chave)
+            self.misses += 1
+            return default
+
+    def set(self, chave, valor, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl or ttl)
+        expira_em = time.monotonic() + ttl if ttl is not None else None
+        tamanho = self.sizeof(valor)
+        if self.max_bytes is not None and tamanho > self.max_bytes:
+            return
+        with self._lock:
+            if chave in self._dados:
+                self._remover(chave)
+            self._dados[chave] = (valor, expira_em)
+            self.bytes += tamanho
+            while len(self._dados) > self.maxsize or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                self._remover(next(iter(self._dados)))
+
+    def invalidate(self, chave):
+        with self._lock:
+            if chave in self._dados:
+                self._remover(chave)
+
+    def invalidate_where(self, predicado):
+        """Remove todas as entradas cujo valor satisfaz `predicado`."""
+        with self._lock:
+            for chave in [c for c, (v, _) in self._dados.items() if predicado(v)]:
+                self._remover(chave)
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._dados)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        stats = {
+            "entradas": len(self._dados),
+            "max_entradas": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "taxa_acerto": round(self.hits / total, 4) if total else None,
+        }
+        if self._mede_bytes:
+            stats.update({"bytes": self.bytes, "max_bytes": self.max_bytes})
+        return stats
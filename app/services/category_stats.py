@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+
+import sqlalchemy
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import db
+from app.resources.config import settings
+
+# data.category_stats (materialized view criada em app.database.migrations)
+category_stats = sqlalchemy.table(
+    "category_stats",
+    sqlalchemy.column("category"),
+    sqlalchemy.column("quantidade"),
+    sqlalchemy.column("com_preco"),
+    sqlalchemy.column("minimo"),
+    sqlalchemy.column("mediana"),
+    sqlalchemy.column("maximo"),
+    sqlalchemy.column("faixas"),
+    sqlalchemy.column("atualizado_em"),
+    schema="data",
+)
+
+
+async def listar_estatisticas(session: AsyncSession, categoria: str | None = None) -> list[dict]:
+    """Linhas da view; com `categoria`, uma consulta pelo índice único."""
+    query = sqlalchemy.select(category_stats).order_by(category_stats.c.category)
+    if categoria is not None:
+        query = query.where(category_stats.c.category == categoria)
+    result = await session.execute(query)
+    return [dict(row._mapping) for row in result]
+
+
+class AtualizadorEstatisticas:
+    """
+    Atualiza `data.category_stats` com REFRESH MATERIALIZED VIEW
+    CONCURRENTLY (leituras não bloqueiam) fora da requisição.
+
+    `agendar()` é chamado após cada ingestão: as chamadas feitas durante o
+    `atraso` entram no mesmo REFRESH, e as feitas durante um REFRESH geram
+    mais um ao final.
+    """
+
+    def __init__(self, atraso: float):
+        self.atraso = atraso
+        self.atualizacoes = 0
+        self.ultima_duracao_s: float | None = None
+        self._tarefa: asyncio.Task | None = None
+        self._pendente = False
+
+    def agendar(self):
+        if self._tarefa is not None and not self._tarefa.done():
+            self._pendente = True
+            return
+        self._tarefa = asyncio.create_task(self._executar())
+
+    async def _executar(self):
+        while True:
+            await asyncio.sleep(self.atraso)
+            self._pendente = False
+            try:
+                await self.atualizar()
+            except Exception:
+                logging.exception("Falha ao atualizar data.category_stats")
+            if not self._pendente:
+                return
+
+    async def atualizar(self):
+        inicio = time.perf_counter()
+        async with db.AsyncSessionLocal() as session:
+            await session.execute(
+                sqlalchemy.text("REFRESH MATERIALIZED VIEW CONCURRENTLY data.category_stats")
+            )
+            await session.commit()
+        self.ultima_duracao_s = round(time.perf_counter() - inicio, 4)
+        self.atualizacoes += 1
+
+    async def shutdown(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            self._tarefa = None
+
+
+atualizador_estatisticas = AtualizadorEstatisticas(settings.estatisticas_atraso_segundos)
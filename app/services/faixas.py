@@ -0,0 +1,17 @@
+"""Faixas de preço usadas na predição e nas estatísticas por categoria."""
+import bisect
+
+# Limites no formato do pd.cut: a faixa labels[i] é o intervalo (bins[i], bins[i + 1]]
+bins = [0, 1000, 2000, 3000, 4000, 5000, 10000]
+labels = ["Muito Barato", "Barato", "Médio", "Caro", "Muito Caro", "Luxo"]
+
+
+def faixa_preco(preco: float) -> str | None:
+    """Equivalente a `pd.cut(preco, bins, labels)` para um único valor."""
+    i = bisect.bisect_left(bins, preco)
+    return labels[i - 1] if 1 <= i <= len(labels) else None
+
+
+def intervalos() -> list[tuple[str, float, float]]:
+    """(rótulo, limite inferior exclusivo, limite superior inclusivo) de cada faixa."""
+    return list(zip(labels, bins, bins[1:]))
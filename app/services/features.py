@@ -0,0 +1,201 @@
+"""
+Extração de features dos dados de celulares.
+
+Usado tanto no treino quanto na predição, para que o payload de `Celular`
+passe exatamente pelas mesmas transformações que os dados de treino.
+Todas as funções operam sobre colunas inteiras (operações vetorizadas de
+string do pandas), sem `apply` linha a linha.
+"""
+import re
+
+import pandas as pd
+
+# "195 g", "6,6 polegadas", "5000 mAh" -> primeiro número
+PADRAO_NUMERO = re.compile(r"([\d,.]+)")
+# "3200 x 2400" (já sem o sufixo "pixel")
+PADRAO_RESOLUCAO = re.compile(r"^\s*(\d+)\s*[xX]\s*(\d+)\s*$")
+
+DESCONHECIDO = "Desconhecido"
+
+# Colunas de texto convertidas para o primeiro número encontrado
+COLUNAS_NUMERICAS = [
+    "peso", "bateria_carga", "tela_fps", "memoria_max", "memoria_ram",
+    "camera_megapixel", "tela_densidade_pixels", "tela_tamanho",
+]
+# Colunas já numéricas (derivadas ou enviadas assim pelo payload)
+COLUNAS_DERIVADAS = ["tela_largura", "tela_altura", "disponibilidade"]
+
+COLUNAS_CATEGORICAS = [
+    "sistema_operacional", "dimensoes", "processador", "chipset",
+    "gpu", "tela_tipo", "bateria_tipo", "camera_resolucao",
+]
+
+# Colunas da tabela data.registration_features, na ordem do modelo ORM
+COLUNAS_MATERIALIZADAS = (
+    ["preco"] + COLUNAS_NUMERICAS + COLUNAS_DERIVADAS + COLUNAS_CATEGORICAS
+)
+
+COLUNAS_PRECO = ["preco", "preco_medio", "precos"]
+COLUNAS_DESCARTADAS = [
+    "id", "name", "category", "release_date", "status",
+    "url", "source", "created_at", "updated_at",
+    "memoria_expansivel", "resistencia_agua",
+]
+
+
+def extrair_numeros(serie: pd.Series) -> pd.Series:
+    """Primeiro número de cada texto, com vírgula decimal; NaN se não houver."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype(float)
+    numeros = (
+        serie.astype("string")
+        .str.extract(PADRAO_NUMERO, expand=False)
+        .str.replace(",", ".", regex=False)
+    )
+    return pd.to_numeric(numeros, errors="coerce").astype(float)
+
+
+def converter_precos(serie: pd.Series) -> pd.Series:
+    """"R$ 1.234,56" -> 1234.56; NaN quando não for um preço."""
+    precos = (
+        serie.astype("string")
+        .str.replace("R$", "", regex=False)
+        .str.replace(".", "", regex=False)
+        .str.replace(",", ".", regex=False)
+        .str.strip()
+    )
+    return pd.to_numeric(precos, errors="coerce").astype(float)
+
+
+def extrair_preco(df: pd.DataFrame) -> pd.Series:
+    """`preco_medio` quando houver; senão o primeiro item de `precos` ("R$ 1.234,56")."""
+    preco = pd.Series(float("nan"), index=df.index, dtype=float)
+    if "precos" in df.columns:
+        preco = converter_precos(df["precos"].str[0])
+    if "preco_medio" in df.columns:
+        preco = pd.to_numeric(df["preco_medio"], errors="coerce").fillna(preco)
+    return preco
+
+
+def extrair_observacoes_preco(df: pd.DataFrame) -> pd.Series:
+    """
+    Todos os preços de `precos`, uma entrada por preço (o índice da linha
+    de origem se repete). Linhas sem nenhum preço válido na lista usam
+    `preco_medio`, se houver.
+    """
+    observacoes = pd.Series(dtype=float)
+    if "precos" in df.columns:
+        observacoes = converter_precos(df["precos"].explode()).dropna()
+    if "preco_medio" in df.columns:
+        medio = pd.to_numeric(df["preco_medio"], errors="coerce").dropna()
+        medio = medio[~medio.index.isin(observacoes.index)].astype(float)
+        observacoes = pd.concat([observacoes, medio])
+    return observacoes.sort_index(kind="stable")
+
+
+def separar_resolucao(serie: pd.Series) -> pd.DataFrame:
+    """'3200 x 2400 pixel' -> colunas tela_largura e tela_altura."""
+    partes = (
+        serie.astype("string")
+        .str.split("pixel", n=1).str[0]
+        .str.extract(PADRAO_RESOLUCAO)
+    )
+    partes.columns = ["tela_largura", "tela_altura"]
+    return partes.apply(pd.to_numeric, errors="coerce").astype(float)
+
+
+def calcular_disponibilidade(serie: pd.Series) -> pd.Series:
+    """Idade do modelo em meses a partir da data de disponibilidade."""
+    datas = pd.to_datetime(serie, errors="coerce")
+    return ((pd.Timestamp.now() - datas).dt.days // 30).astype(float)
+
+
+def preparar_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Limpa um DataFrame de celulares (dados brutos do treino ou payloads
+    de `Celular`) e devolve apenas as colunas de features.
+    """
+    df = df.drop(columns=COLUNAS_DESCARTADAS + COLUNAS_PRECO, errors="ignore")
+
+    for col in COLUNAS_NUMERICAS:
+        if col in df.columns:
+            df[col] = extrair_numeros(df[col])
+
+    # Separando tela_resolucao em largura e altura; valores já informados
+    # no payload têm precedência
+    if "tela_resolucao" in df.columns:
+        resolucao = separar_resolucao(df["tela_resolucao"])
+        for col in resolucao.columns:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors="coerce").fillna(resolucao[col])
+            else:
+                df[col] = resolucao[col]
+        df = df.drop(columns="tela_resolucao")
+
+    for col in COLUNAS_DERIVADAS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
+
+    # Preencher valores ausentes das colunas categóricas
+    numericas = set(COLUNAS_NUMERICAS + COLUNAS_DERIVADAS)
+    categoricas = [c for c in df.columns if c not in numericas]
+    if categoricas:
+        df[categoricas] = df[categoricas].astype(object).fillna(DESCONHECIDO)
+
+    return df
+
+
+def materializar_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte os dados brutos de `Registration.data` nas colunas tipadas de
+    `COLUNAS_MATERIALIZADAS`, calculadas uma vez na ingestão.
+    `disponibilidade` é mantida como data; a idade é calculada no treino.
+    """
+    out = pd.DataFrame(index=df.index)
+    out["preco"] = extrair_preco(df)
+
+    vazio = pd.Series(float("nan"), index=df.index, dtype=float)
+    for col in COLUNAS_NUMERICAS:
+        out[col] = extrair_numeros(df[col]) if col in df.columns else vazio
+
+    if "tela_resolucao" in df.columns:
+        resolucao = separar_resolucao(df["tela_resolucao"])
+    else:
+        resolucao = pd.DataFrame({"tela_largura": vazio, "tela_altura": vazio})
+    out["tela_largura"] = resolucao["tela_largura"]
+    out["tela_altura"] = resolucao["tela_altura"]
+
+    if "disponibilidade" in df.columns:
+        out["disponibilidade"] = pd.to_datetime(df["disponibilidade"], errors="coerce")
+    else:
+        out["disponibilidade"] = pd.NaT
+
+    for col in COLUNAS_CATEGORICAS:
+        out[col] = df[col] if col in df.columns else None
+
+    return out[COLUNAS_MATERIALIZADAS]
+
+
+def para_registros(df: pd.DataFrame) -> list[dict]:
+    """Linhas do DataFrame como dicts, com NaN/NaT trocados por None."""
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict(orient="records")
+
+
+def preparar_treino(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Separa features (X) e preço (y), descartando linhas sem preço.
+    Aceita tanto os dados brutos quanto as colunas materializadas.
+    """
+    if "preco" in df.columns:
+        preco = pd.to_numeric(df["preco"], errors="coerce").astype(float)
+    else:
+        preco = extrair_preco(df)
+    df = df[preco.notna()].copy()
+
+    if "disponibilidade" in df.columns:
+        df["disponibilidade"] = calcular_disponibilidade(df["disponibilidade"])
+
+    X = preparar_features(df)
+    y = preco[preco.notna()]
+    return X, y
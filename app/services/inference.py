@@ -0,0 +1,178 @@
+"""
+Caminho de predição de uma linha sem pandas nem ColumnTransformer.
+
+`compilar_preditor` lê os passos já treinados do Pipeline (medianas do
+SimpleImputer, categorias do OneHotEncoder, ordem das colunas) e monta um
+`PreditorLinha` que transforma o payload de `Celular` direto em um vetor
+numpy. Antes de ser usado, o preditor é conferido contra o Pipeline em
+payloads de amostra; qualquer diferença de bit descarta o caminho compilado.
+"""
+import logging
+import math
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from app.services.features import (
+    COLUNAS_NUMERICAS, DESCONHECIDO, PADRAO_NUMERO, PADRAO_RESOLUCAO,
+    preparar_features,
+)
+
+NAN = float("nan")
+
+
+def _numero(valor) -> float:
+    """Versão escalar de `extrair_numeros`."""
+    if valor is None:
+        return NAN
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    encontrado = PADRAO_NUMERO.search(str(valor))
+    if not encontrado:
+        return NAN
+    try:
+        return float(encontrado.group(1).replace(",", "."))
+    except ValueError:
+        return NAN
+
+
+def _resolucao(valor) -> tuple[float, float]:
+    """Versão escalar de `separar_resolucao`."""
+    if valor is None:
+        return NAN, NAN
+    encontrado = PADRAO_RESOLUCAO.search(str(valor).split("pixel", 1)[0])
+    if not encontrado:
+        return NAN, NAN
+    return float(encontrado.group(1)), float(encontrado.group(2))
+
+
+def _valor_numerico(payload: dict, coluna: str) -> float:
+    """Valor da coluna numérica como `preparar_features` deixaria."""
+    valor = payload.get(coluna)
+    if coluna in COLUNAS_NUMERICAS:
+        return _numero(valor)
+    try:
+        valor = NAN if valor is None else float(valor)
+    except (TypeError, ValueError):
+        valor = NAN
+    if math.isnan(valor) and coluna in ("tela_largura", "tela_altura"):
+        largura, altura = _resolucao(payload.get("tela_resolucao"))
+        valor = largura if coluna == "tela_largura" else altura
+    return valor
+
+
+class PreditorLinha:
+    """Transformação e predição de um payload usando apenas numpy."""
+
+    def __init__(self, pipeline):
+        preprocessor = pipeline.named_steps["preprocessor"]
+        self.modelo = pipeline.named_steps["model"]
+
+        transformadores = {
+            nome: (transformador, list(colunas))
+            for nome, transformador, colunas in preprocessor.transformers_
+            if nome != "remainder"
+        }
+        imputer, self.colunas_numericas = transformadores["num"]
+        categorico, self.colunas_categoricas = transformadores["cat"]
+        encoder = categorico.named_steps["encoder"]
+        if getattr(encoder, "drop_idx_", None) is not None or getattr(
+            encoder, "infrequent_categories_", None
+        ):
+            raise ValueError("OneHotEncoder com drop/infrequent não é suportado")
+
+        self.medianas = np.asarray(imputer.statistics_, dtype=np.float64)
+        n_numericas = len(self.colunas_numericas)
+
+        # coluna -> {categoria: posição no vetor}
+        self.posicoes = []
+        inicio = n_numericas
+        for categorias in encoder.categories_:
+            self.posicoes.append(
+                {categoria: inicio + i for i, categoria in enumerate(categorias)}
+            )
+            inicio += len(categorias)
+        self.n_colunas = inicio
+
+        # Floresta: soma das árvores na mesma ordem da predição sequencial do
+        # sklearn, sem o despacho do joblib a cada chamada
+        self.arvores = None
+        if isinstance(self.modelo, RandomForestRegressor):
+            self.arvores = [arvore.tree_ for arvore in self.modelo.estimators_]
+
+    def vetor(self, payload: dict) -> np.ndarray:
+        linha = np.zeros((1, self.n_colunas), dtype=np.float64)
+        for i, coluna in enumerate(self.colunas_numericas):
+            valor = _valor_numerico(payload, coluna)
+            linha[0, i] = self.medianas[i] if math.isnan(valor) else valor
+
+        for coluna, posicoes in zip(self.colunas_categoricas, self.posicoes):
+            valor = payload.get(coluna)
+            # handle_unknown="ignore": categoria nova fica toda em zero
+            posicao = posicoes.get(DESCONHECIDO if valor is None else valor)
+            if posicao is not None:
+                linha[0, posicao] = 1.0
+        return linha
+
+    def prever(self, payload: dict) -> float:
+        linha = self.vetor(payload)
+        if self.arvores is None:
+            return float(self.modelo.predict(linha)[0])
+
+        linha = linha.astype(np.float32)
+        soma = np.zeros(1, dtype=np.float64)
+        for arvore in self.arvores:
+            soma += arvore.predict(linha)[:, 0]
+        soma /= len(self.arvores)
+        return float(soma[0])
+
+
+def _amostras(preditor: PreditorLinha) -> list[dict]:
+    """Payloads de conferência: valores ausentes, medianas, categorias vistas e novas."""
+    colunas = preditor.colunas_numericas + preditor.colunas_categoricas
+    vazio = {coluna: None for coluna in colunas} | {"tela_resolucao": None}
+    amostras = [vazio]
+    for k in range(3):
+        amostra = dict(vazio)
+        for coluna, mediana in zip(preditor.colunas_numericas, preditor.medianas):
+            amostra[coluna] = float(mediana) * (0.5 + k)
+        for coluna, posicoes in zip(preditor.colunas_categoricas, preditor.posicoes):
+            categorias = list(posicoes)
+            amostra[coluna] = categorias[(k * 7) % len(categorias)]
+        amostras.append(amostra)
+    amostras.append(
+        vazio
+        | {coluna: "__nao_visto__" for coluna in preditor.colunas_categoricas}
+        | {"tela_largura": None, "tela_altura": None, "tela_resolucao": "1080 x 2400 pixel"}
+    )
+    return amostras
+
+
+def conferir(preditor: PreditorLinha, pipeline) -> bool:
+    """Compara, bit a bit, o preditor com o Pipeline em cada amostra."""
+    for amostra in _amostras(preditor):
+        esperado = pipeline.predict(preparar_features(pd.DataFrame([amostra])))
+        obtido = np.array([preditor.prever(amostra)], dtype=np.float64)
+        esperado = esperado.astype(np.float64)
+        if obtido.tobytes() != esperado.tobytes():
+            logging.warning(
+                "Preditor compilado diverge do Pipeline (%r != %r)", obtido[0], esperado[0]
+            )
+            return False
+    return True
+
+
+def compilar_preditor(pipeline) -> PreditorLinha | None:
+    """
+    `PreditorLinha` do Pipeline treinado, ou None quando o Pipeline tem um
+    formato não suportado ou a conferência falha (as predições de uma linha
+    seguem então pelo Pipeline).
+    """
+    try:
+        preditor = PreditorLinha(pipeline)
+        if conferir(preditor, pipeline):
+            return preditor
+    except Exception:
+        logging.warning("Não foi possível compilar o preditor de linha", exc_info=True)
+    return None
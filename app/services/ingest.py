@@ -0,0 +1,206 @@
+import hashlib
+import json
+import logging
+
+import pandas as pd
+import sqlalchemy
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Category, Registration, RegistrationFeatures
+from app.schemas.register import Register
+from app.services.features import (
+    COLUNAS_MATERIALIZADAS, extrair_observacoes_preco, materializar_features,
+    para_registros,
+)
+from app.services.prices import registrar_precos
+
+CRIADO = "criado"
+ATUALIZADO = "atualizado"
+INALTERADO = "inalterado"
+DUPLICADO = "duplicado"
+INVALIDO = "invalido"
+
+# Colunas de Registration sobrescritas quando o conteúdo muda
+COLUNAS_ATUALIZAVEIS = ["category", "release_date", "status", "data", "url", "source", "data_hash"]
+
+
+def hash_conteudo(register: Register) -> str:
+    """
+    sha256 do payload normalizado pelo schema (JSON com chaves ordenadas),
+    sem o nome, que é a chave do registro.
+    """
+    conteudo = register.model_dump(mode="json", exclude={"name"})
+    canonico = json.dumps(conteudo, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonico.encode()).hexdigest()
+
+
+def para_linha(register: Register) -> dict:
+    """Valores de INSERT em `data.registrations`, com o hash do conteúdo."""
+    return {**register.model_dump(), "data_hash": hash_conteudo(register)}
+
+
+async def salvar_features(session: AsyncSession, registros: list[tuple[str, str, dict]]):
+    """
+    Calcula as features de `(registration_id, category, data)` em um único
+    DataFrame, grava (ou substitui) em `data.registration_features` e
+    registra todos os preços de `data.precos` como observações em
+    `data.prices`. Não faz commit.
+    """
+    if not registros:
+        return
+
+    bruto = pd.DataFrame([data or {} for _, _, data in registros])
+    df = materializar_features(bruto)
+    linhas = [
+        {"registration_id": registration_id, **features}
+        for (registration_id, _, _), features in zip(registros, para_registros(df))
+    ]
+
+    stmt = pg_insert(RegistrationFeatures)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RegistrationFeatures.registration_id],
+        set_={
+            **{coluna: stmt.excluded[coluna] for coluna in COLUNAS_MATERIALIZADAS},
+            "updated_at": sqlalchemy.func.now(),
+        },
+    )
+    await session.execute(stmt, linhas)
+
+    observacoes = extrair_observacoes_preco(bruto)
+    await registrar_precos(session, [
+        (registros[i][0], registros[i][1], float(preco))
+        for i, preco in observacoes.items()
+    ])
+
+
+async def materializar_pendentes(session: AsyncSession, tamanho_lote: int = 1000) -> int:
+    """
+    Calcula as features dos registros que ainda não as têm (por exemplo,
+    inseridos antes da tabela existir). Retorna quantos foram processados.
+    """
+    query = (
+        sqlalchemy.select(Registration.id, Registration.category, Registration.data)
+        .outerjoin(RegistrationFeatures)
+        .where(RegistrationFeatures.registration_id.is_(None))
+        .limit(tamanho_lote)
+    )
+    total = 0
+    while True:
+        result = await session.execute(query)
+        pendentes = [(r.id, r.category, r.data) for r in result]
+        if not pendentes:
+            break
+        await salvar_features(session, pendentes)
+        await session.commit()
+        total += len(pendentes)
+
+    if total:
+        logging.info("Features materializadas para %s registros existentes", total)
+    return total
+
+
+async def _garantir_categorias(session: AsyncSession, registros: list[Register]):
+    categorias = sorted({r.category for r in registros})
+    await session.execute(
+        pg_insert(Category)
+        .values([{"name": c} for c in categorias])
+        .on_conflict_do_nothing(index_elements=[Category.name])
+    )
+
+
+async def inserir_lote(session: AsyncSession, registros: list[Register]) -> dict[str, str]:
+    """
+    Insere um lote de registros com nomes distintos usando operações em
+    conjunto: uma consulta para os nomes existentes, um upsert para as
+    categorias e um único INSERT (executemany) para os registros.
+    Retorna `nome -> CRIADO | DUPLICADO`. Não faz commit.
+    """
+    nomes = [r.name for r in registros]
+    existentes = set(await session.scalars(
+        sqlalchemy.select(Registration.name).where(Registration.name.in_(nomes))
+    ))
+    novos = [r for r in registros if r.name not in existentes]
+
+    criados = {}
+    if novos:
+        await _garantir_categorias(session, novos)
+
+        # ON CONFLICT cobre nomes inseridos por outra requisição nesse meio tempo
+        result = await session.execute(
+            pg_insert(Registration)
+            .on_conflict_do_nothing(index_elements=[Registration.name])
+            .returning(Registration.id, Registration.name),
+            [para_linha(r) for r in novos],
+        )
+        criados = {row.name: row.id for row in result}
+
+        await salvar_features(session, [
+            (criados[r.name], r.category, r.data.model_dump())
+            for r in novos if r.name in criados
+        ])
+
+    return {nome: CRIADO if nome in criados else DUPLICADO for nome in nomes}
+
+
+async def upsert_lote(session: AsyncSession, registros: list[Register]) -> dict[str, str]:
+    """
+    Upsert idempotente de um lote com nomes distintos. Primeiro lê
+    `(name, data_hash)` dos nomes do lote e separa os novos e os alterados;
+    só esses vão para o INSERT ... ON CONFLICT (name) DO UPDATE. Mesmo com
+    um WHERE falso, o ON CONFLICT DO UPDATE trava a linha em conflito (grava
+    xmax, suja a página e gera WAL), então registros inalterados não podem
+    chegar a ele. O WHERE data_hash IS DISTINCT FROM excluded.data_hash
+    continua lá para quem gravou o mesmo conteúdo entre a leitura e o upsert.
+    Só os criados ou alterados têm features recalculadas e novos preços.
+    Retorna `nome -> CRIADO | ATUALIZADO | INALTERADO`. Não faz commit.
+    """
+    if not registros:
+        return {}
+    linhas = {r.name: para_linha(r) for r in registros}
+    existentes = dict((await session.execute(
+        sqlalchemy.select(Registration.name, Registration.data_hash)
+        .where(Registration.name.in_(list(linhas)))
+    )).all())
+    # Ordem fixa de travas entre lotes concorrentes com nomes em comum
+    pendentes = sorted(
+        (
+            r for r in registros
+            if r.name not in existentes or existentes[r.name] != linhas[r.name]["data_hash"]
+        ),
+        key=lambda r: r.name,
+    )
+
+    escritos = {}
+    if pendentes:
+        await _garantir_categorias(session, pendentes)
+
+        stmt = pg_insert(Registration)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Registration.name],
+            set_={
+                **{coluna: stmt.excluded[coluna] for coluna in COLUNAS_ATUALIZAVEIS},
+                "updated_at": sqlalchemy.func.now(),
+            },
+            where=Registration.data_hash.is_distinct_from(stmt.excluded.data_hash),
+        ).returning(
+            Registration.id,
+            Registration.name,
+            # xmax = 0 só para linhas recém-inseridas
+            sqlalchemy.literal_column("xmax = 0").label("inserido"),
+        )
+        result = await session.execute(stmt, [linhas[r.name] for r in pendentes])
+        escritos = {row.name: (row.id, row.inserido) for row in result}
+
+        await salvar_features(session, [
+            (escritos[r.name][0], r.category, r.data.model_dump())
+            for r in pendentes if r.name in escritos
+        ])
+
+    status_por_nome = {}
+    for r in registros:
+        if r.name not in escritos:
+            status_por_nome[r.name] = INALTERADO
+        else:
+            status_por_nome[r.name] = CRIADO if escritos[r.name][1] else ATUALIZADO
+    return status_por_nome
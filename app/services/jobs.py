@@ -0,0 +1,416 @@
+import asyncio
+import logging
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+import pandas as pd
+import sqlalchemy
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import db
+from app.models import RegistrationFeatures, TrainingRun
+from app.resources.config import settings
+from app.services import metrics
+from app.services.features import COLUNAS_MATERIALIZADAS
+from app.services.ingest import materializar_pendentes
+from app.services.model_registry import registry, trava_artefato
+from app.services.profiling import RegistroEtapas
+
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+ATIVOS = (PENDENTE, EXECUTANDO)
+
+# O worker dono de um job ativo renova `atualizado_em` a cada BATIMENTO_S;
+# sem renovação por ABANDONO_S (worker morto no meio do treino), o job é
+# marcado como falho e deixa de bloquear novos treinos
+BATIMENTO_S = 30
+ABANDONO_S = 120
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class TrainingJob:
+    id: str
+    status: str = PENDENTE
+    etapa: str | None = None
+    criado_em: datetime = field(default_factory=_agora)
+    iniciado_em: datetime | None = None
+    finalizado_em: datetime | None = None
+    parametros: dict = field(default_factory=dict)
+    resultado: dict | None = None
+    erro: str | None = None
+
+    @classmethod
+    def de_execucao(cls, run: TrainingRun) -> "TrainingJob":
+        return cls(
+            id=run.id,
+            status=run.status,
+            etapa=run.etapa,
+            # execuções anteriores à coluna criado_em
+            criado_em=run.criado_em or run.iniciado_em,
+            iniciado_em=run.iniciado_em,
+            finalizado_em=run.finalizado_em,
+            parametros=run.parametros or {},
+            resultado=run.resultado,
+            erro=run.erro,
+        )
+
+    @property
+    def ativo(self) -> bool:
+        return self.status in ATIVOS
+
+    @property
+    def duracao_s(self) -> float | None:
+        if not self.iniciado_em:
+            return None
+        fim = self.finalizado_em or _agora()
+        return round((fim - self.iniciado_em).total_seconds(), 3)
+
+    def como_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "etapa": self.etapa,
+            "parametros": self.parametros,
+            "criado_em": self.criado_em,
+            "iniciado_em": self.iniciado_em,
+            "finalizado_em": self.finalizado_em,
+            "duracao_s": self.duracao_s,
+            "resultado": self.resultado,
+            "erro": self.erro,
+        }
+
+
+async def carregar_features(session, tamanho_lote: int) -> tuple[pd.DataFrame, int]:
+    """
+    Lê as features materializadas com um cursor do lado do servidor, em
+    blocos de `tamanho_lote` linhas, montando o DataFrame incrementalmente.
+    Retorna o DataFrame e o número de blocos lidos.
+    """
+    colunas = [getattr(RegistrationFeatures, c) for c in COLUNAS_MATERIALIZADAS]
+    query = sqlalchemy.select(*colunas).execution_options(yield_per=tamanho_lote)
+
+    blocos = []
+    result = await session.stream(query)
+    async for linhas in result.partitions():
+        blocos.append(pd.DataFrame.from_records(
+            [tuple(linha) for linha in linhas], columns=COLUNAS_MATERIALIZADAS
+        ))
+    df = (
+        pd.concat(blocos, ignore_index=True) if blocos
+        else pd.DataFrame(columns=COLUNAS_MATERIALIZADAS)
+    )
+    return df, len(blocos)
+
+
+async def _carregar_dados(registro: RegistroEtapas, tamanho_lote: int) -> pd.DataFrame:
+    """
+    Materializa as features pendentes e lê o conjunto de treino com uma
+    conexão própria do processo de treino (o pool da API não atravessa o
+    spawn, e cada job roda em um event loop novo).
+    """
+    engine = create_async_engine(
+        db.SQLALCHEMY_DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            "statement_cache_size": settings.db_statement_cache_size,
+        },
+    )
+    try:
+        async with AsyncSession(engine) as session:
+            with registro.etapa("materializar_features") as info:
+                info["linhas"] = await materializar_pendentes(session)
+
+            with registro.etapa("carregar_dados") as info:
+                df, blocos = await carregar_features(session, tamanho_lote)
+                info.update({"linhas": len(df), "blocos": blocos})
+    finally:
+        await engine.dispose()
+    return df
+
+
+def _treinar(caminho: str, tamanho_lote: int, **parametros) -> dict:
+    """
+    Executado no processo de treino: os dados são lidos do banco aqui, então
+    nem o DataFrame nem o sklearn passam pelo processo da API. Com vários
+    workers, treinos submetidos em workers diferentes esperam a vez em
+    `trava_artefato`.
+    """
+    from app.services.training import treinar
+
+    registro = RegistroEtapas()
+    with trava_artefato(caminho):
+        df = asyncio.run(_carregar_dados(registro, tamanho_lote))
+        resultado = treinar(df, caminho, **parametros)
+    resultado["etapas"] = registro.etapas + resultado.get("etapas", [])
+    return resultado
+
+
+class TreinoEmAndamento(Exception):
+    """Há um treino ativo com parâmetros diferentes dos submetidos."""
+
+    def __init__(self, job: TrainingJob):
+        super().__init__(f"Treino {job.id} em andamento com outros parâmetros")
+        self.job = job
+
+
+def _colunas(job: TrainingJob) -> dict:
+    """Valores de `data.training_runs` para o estado atual do job."""
+    resultado = job.resultado or {}
+    metricas = {
+        chave: resultado[chave]
+        for chave in ("metricas_teste", "metricas_teste_modelo_atual", "busca")
+        if chave in resultado
+    }
+    return {
+        "id": job.id,
+        "status": job.status,
+        "etapa": job.etapa,
+        "parametros": job.parametros,
+        "resultado": job.resultado,
+        "linhas": resultado.get("linhas"),
+        "features": resultado.get("features"),
+        "etapas": resultado.get("etapas"),
+        "metricas": metricas or None,
+        "estimador": resultado.get("estimador") or job.parametros.get("estimador"),
+        "benchmark": resultado.get("benchmark"),
+        "versao_modelo": resultado.get("versao_modelo"),
+        "promovido": resultado.get("promovido"),
+        "erro": job.erro,
+        "criado_em": job.criado_em,
+        "iniciado_em": job.iniciado_em,
+        "finalizado_em": job.finalizado_em,
+        "duracao_s": job.duracao_s,
+        "atualizado_em": sqlalchemy.func.now(),
+    }
+
+
+async def gravar_job(job: TrainingJob):
+    """Grava (ou atualiza) o estado do job em `data.training_runs`."""
+    valores = _colunas(job)
+    stmt = pg_insert(TrainingRun).values(valores)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TrainingRun.id],
+        set_={coluna: stmt.excluded[coluna] for coluna in valores if coluna != "id"},
+    )
+    async with db.AsyncSessionLocal() as session:
+        await session.execute(stmt)
+        await session.commit()
+
+
+async def _marcar_abandonados(session):
+    """Jobs ativos sem batimento há ABANDONO_S segundos passam a `falhou`."""
+    await session.execute(
+        sqlalchemy.update(TrainingRun)
+        .where(
+            TrainingRun.status.in_(ATIVOS),
+            TrainingRun.atualizado_em < sqlalchemy.func.now() - timedelta(seconds=ABANDONO_S),
+        )
+        .values(
+            status=FALHOU,
+            erro="Treino abandonado: o worker que o executava foi encerrado",
+            finalizado_em=sqlalchemy.func.now(),
+        )
+    )
+    await session.commit()
+
+
+async def _job_ativo(session) -> TrainingRun | None:
+    return await session.scalar(
+        sqlalchemy.select(TrainingRun).where(TrainingRun.status.in_(ATIVOS)).limit(1)
+    )
+
+
+def _mais_recentes():
+    return sqlalchemy.func.coalesce(TrainingRun.criado_em, TrainingRun.iniciado_em).desc()
+
+
+async def obter_job(session, job_id: str) -> TrainingJob | None:
+    await _marcar_abandonados(session)
+    run = await session.get(TrainingRun, job_id)
+    return TrainingJob.de_execucao(run) if run else None
+
+
+async def listar_jobs(session, limit: int) -> list[TrainingJob]:
+    await _marcar_abandonados(session)
+    result = await session.execute(
+        sqlalchemy.select(TrainingRun).order_by(_mais_recentes()).limit(limit)
+    )
+    return [TrainingJob.de_execucao(run) for run in result.scalars()]
+
+
+async def listar_execucoes(session, limit: int) -> list[TrainingRun]:
+    result = await session.execute(
+        sqlalchemy.select(TrainingRun)
+        .order_by(_mais_recentes())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def _batimento(job_id: str):
+    while True:
+        await asyncio.sleep(BATIMENTO_S)
+        try:
+            async with db.AsyncSessionLocal() as session:
+                await session.execute(
+                    sqlalchemy.update(TrainingRun)
+                    .where(TrainingRun.id == job_id)
+                    .values(atualizado_em=sqlalchemy.func.now())
+                )
+                await session.commit()
+        except Exception:
+            logging.exception("Não foi possível renovar o treino %s", job_id)
+
+
+class GerenciadorTreinos:
+    """
+    Executa treinos em um pool de processos, fora do event loop.
+
+    O estado dos jobs fica em `data.training_runs`, visível para todos os
+    workers (e para o worker que substitui o dono do job no `app.serve`).
+    Só existe um treino ativo por vez, garantido por um índice único
+    parcial: novas submissões com os mesmos parâmetros enquanto um treino
+    está pendente ou executando recebem o mesmo job, e com parâmetros
+    diferentes levantam `TreinoEmAndamento`. O processo de treino ainda serializa
+    a escrita do artefato com `trava_artefato`.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self.max_workers = max_workers
+        self._executor: ProcessPoolExecutor | None = None
+        self._tarefas: set[asyncio.Task] = set()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # "spawn" evita herdar threads e conexões do processo da API;
+            # um processo novo por treino, que sai ao terminar: sklearn,
+            # pandas e o pico de memória do treino não ficam residentes
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=1,
+            )
+        return self._executor
+
+    async def submeter(self, **parametros) -> tuple[TrainingJob, bool]:
+        """
+        Retorna o job do treino e se ele foi criado agora. `parametros` são
+        repassados a `treinar`. Um treino já ativo (em qualquer worker) com
+        os mesmos parâmetros é retornado como está; com outros parâmetros,
+        levanta `TreinoEmAndamento`.
+        """
+        async with db.AsyncSessionLocal() as session:
+            await _marcar_abandonados(session)
+            ativo = await _job_ativo(session)
+            if ativo is not None:
+                return self._mesmo_treino(ativo, parametros), False
+
+        job = TrainingJob(id=uuid.uuid4().hex, parametros=parametros)
+        try:
+            await gravar_job(job)
+        except IntegrityError:
+            # Outro worker criou um job ativo entre a leitura e o INSERT
+            async with db.AsyncSessionLocal() as session:
+                ativo = await _job_ativo(session)
+            if ativo is None:
+                raise
+            return self._mesmo_treino(ativo, parametros), False
+
+        tarefa = asyncio.create_task(self._executar(job))
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+        return job, True
+
+    @staticmethod
+    def _mesmo_treino(ativo: TrainingRun, parametros: dict) -> TrainingJob:
+        job = TrainingJob.de_execucao(ativo)
+        if job.parametros != parametros:
+            raise TreinoEmAndamento(job)
+        return job
+
+    async def _gravar(self, job: TrainingJob):
+        try:
+            await gravar_job(job)
+        except Exception:
+            logging.exception("Não foi possível gravar o estado do treino %s", job.id)
+
+    async def _executar(self, job: TrainingJob):
+        job.status = EXECUTANDO
+        job.iniciado_em = _agora()
+        # Leitura dos dados e treino acontecem no processo de treino;
+        # aqui só trafegam os parâmetros e o resultado
+        job.etapa = "treinando"
+        await self._gravar(job)
+        batimento = asyncio.create_task(_batimento(job.id))
+
+        # No processo da API só o tempo de relógio: tracemalloc e CPU do
+        # processo misturariam as requisições concorrentes
+        registro = RegistroEtapas(isolado=False)
+        try:
+            # Artefatos comprimidos não podem ser abertos com memory-map
+            compressao = 0 if settings.modelo_mmap else settings.modelo_compressao
+            loop = asyncio.get_running_loop()
+            resultado = await loop.run_in_executor(
+                self.executor,
+                partial(
+                    _treinar, registry.caminho, settings.treino_tamanho_lote,
+                    compressao=compressao, **job.parametros,
+                ),
+            )
+            # Etapas medidas dentro do processo de treino
+            registro.etapas.extend(resultado.pop("etapas", []))
+
+            if resultado["promovido"]:
+                job.etapa = "ativando_modelo"
+                await self._gravar(job)
+                with registro.etapa("ativar_modelo") as info:
+                    versao = await asyncio.to_thread(registry.carregar)
+                    info["memoria_bytes"] = versao.memoria_bytes
+
+            job.resultado = {
+                **resultado,
+                "versao_modelo": registry.versao_ativa,
+                "etapas": registro.etapas,
+            }
+            job.status = CONCLUIDO
+        except Exception as e:
+            logging.exception("Falha no treino %s", job.id)
+            job.erro = str(e)
+            job.status = FALHOU
+        finally:
+            job.finalizado_em = _agora()
+            batimento.cancel()
+
+        metrics.treinos_total.inc(job.status)
+        for etapa in registro.etapas:
+            metrics.treino_etapas_duracao.observar(etapa["wall_s"], etapa["etapa"])
+
+        await self._gravar(job)
+
+    async def shutdown(self):
+        # Encerramento gracioso (inclusive a troca de workers do app.serve
+        # após um novo artefato): o treino em andamento termina e é gravado
+        if self._tarefas:
+            await asyncio.gather(*self._tarefas, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+gerenciador_treinos = GerenciadorTreinos(max_workers=settings.treino_max_workers)
@@ -21,8 +21,15 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
-def get_username_from_token(token: str, secret_key: str) -> str:
+def decode_token(token: str, secret_key: str) -> dict:
+    """Claims do token (inclui `username` e `exp`)."""
+    claims = jwt.decode(token, secret_key, algorithms=[ALGORITHM])
     try:
-        return TokenData(**jwt.decode(token, secret_key, algorithms=[ALGORITHM])).username
+        TokenData(**claims)
     except ValidationError as validation_error:
         raise ValueError("malformed payload in token") from validation_error
+    return claims
+
+
+def get_username_from_token(token: str, secret_key: str) -> str:
+    return decode_token(token, secret_key).get("username")
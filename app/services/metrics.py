@@ -0,0 +1,244 @@
+"""
+Métricas no formato texto do Prometheus, sem dependências externas.
+
+Histogramas e contadores ficam em memória no processo (com vários workers,
+cada worker exporta os seus). O custo por observação é um `bisect` e um
+lock; a formatação só acontece quando `/metrics` é lido.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+BUCKETS_LATENCIA = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BUCKETS_TREINO = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+_metricas: list = []
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(nomes, valores, extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple[str, ...] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self._series: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        _metricas.append(self)
+
+    def inc(self, *valores_rotulos, valor: float = 1):
+        with self._lock:
+            self._series[valores_rotulos] = self._series.get(valores_rotulos, 0) + valor
+
+    def exportar(self) -> list[str]:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} counter"]
+        with self._lock:
+            series = list(self._series.items())
+        for valores, total in series:
+            linhas.append(f"{self.nome}{_rotulos(self.rotulos, valores)} {_numero(total)}")
+        return linhas
+
+
+class Histograma:
+    def __init__(
+        self,
+        nome: str,
+        ajuda: str,
+        buckets: tuple = BUCKETS_LATENCIA,
+        rotulos: tuple[str, ...] = (),
+    ):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.buckets = tuple(buckets)
+        self.rotulos = rotulos
+        # valores dos rótulos -> [contagem por bucket (+Inf no fim), soma, total]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        _metricas.append(self)
+
+    def observar(self, valor: float, *valores_rotulos):
+        i = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                serie = self._series[valores_rotulos] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self) -> list[str]:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        with self._lock:
+            series = [
+                (valores, list(contagens), soma, total)
+                for valores, (contagens, soma, total) in self._series.items()
+            ]
+        for valores, contagens, soma, total in series:
+            acumulado = 0
+            for limite, contagem in zip((*self.buckets, float("inf")), contagens):
+                acumulado += contagem
+                le = _rotulos(self.rotulos, valores, f'le="{_numero(limite)}"')
+                linhas.append(f"{self.nome}_bucket{le} {acumulado}")
+            rotulos = _rotulos(self.rotulos, valores)
+            linhas.append(f"{self.nome}_sum{rotulos} {_numero(soma)}")
+            linhas.append(f"{self.nome}_count{rotulos} {total}")
+        return linhas
+
+
+def gauge(nome: str, ajuda: str, valores: list[tuple[dict, float]]) -> list[str]:
+    """Linhas de um gauge calculado na hora (estatísticas já existentes)."""
+    linhas = [f"# HELP {nome} {ajuda}", f"# TYPE {nome} gauge"]
+    for rotulos, valor in valores:
+        if valor is None:
+            continue
+        linhas.append(f"{nome}{_rotulos(rotulos.keys(), rotulos.values())} {_numero(valor)}")
+    return linhas
+
+
+def exportar() -> list[str]:
+    """Linhas de todos os contadores e histogramas registrados."""
+    linhas = []
+    for metrica in _metricas:
+        linhas.extend(metrica.exportar())
+    return linhas
+
+
+# HTTP
+requisicoes_duracao = Histograma(
+    "http_requisicao_duracao_segundos", "Latência das requisições por rota",
+    rotulos=("metodo", "rota"),
+)
+requisicoes_total = Contador(
+    "http_requisicoes_total", "Requisições por rota e status",
+    rotulos=("metodo", "rota", "status"),
+)
+requisicoes_consultas = Histograma(
+    "http_requisicao_consultas_db", "Consultas ao banco (round trips) por requisição",
+    buckets=BUCKETS_CONSULTAS, rotulos=("metodo", "rota"),
+)
+requisicoes_tempo_db = Histograma(
+    "http_requisicao_db_segundos", "Tempo total em consultas ao banco por requisição",
+    rotulos=("metodo", "rota"),
+)
+
+# Banco
+consultas_duracao = Histograma(
+    "db_consulta_duracao_segundos", "Duração de cada comando SQL",
+    rotulos=("operacao",),
+)
+
+# Modelo
+predicoes_duracao = Histograma(
+    "modelo_predicao_duracao_segundos", "Duração das chamadas de predição",
+    rotulos=("caminho",),
+)
+predicoes_linhas = Contador(
+    "modelo_predicao_linhas_total", "Linhas pontuadas pelo modelo",
+    rotulos=("caminho",),
+)
+treino_etapas_duracao = Histograma(
+    "treino_etapa_duracao_segundos", "Duração das etapas de treino (fit incluído)",
+    buckets=BUCKETS_TREINO, rotulos=("etapa",),
+)
+treinos_total = Contador(
+    "treinos_total", "Treinos finalizados por status", rotulos=("status",),
+)
+
+
+@dataclass
+class ConsultasRequisicao:
+    quantidade: int = 0
+    tempo_s: float = 0.0
+
+
+# Consultas da requisição em andamento (definido pelo MetricsMiddleware)
+_consultas_requisicao: ContextVar[ConsultasRequisicao | None] = ContextVar(
+    "consultas_requisicao", default=None
+)
+
+
+def instrumentar_consultas(engine):
+    """Mede cada comando SQL do engine e soma na requisição em andamento."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_inicio_consultas", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _depois(conn, cursor, statement, parameters, context, executemany):
+        duracao = time.perf_counter() - conn.info["_inicio_consultas"].pop()
+        operacao = (statement.split(None, 1) or ["?"])[0].upper()
+        consultas_duracao.observar(duracao, operacao)
+        atual = _consultas_requisicao.get()
+        if atual is not None:
+            atual.quantidade += 1
+            atual.tempo_s += duracao
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _erro(contexto):
+        conn = contexto.connection
+        inicios = conn.info.get("_inicio_consultas") if conn is not None else None
+        if inicios:
+            inicios.pop()
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede latência, status e consultas ao banco por rota.
+    A rota é o template do path (`/api/v1/data/{registration_id}/prices`),
+    não a URL, para manter o número de séries limitado.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        consultas = ConsultasRequisicao()
+        token = _consultas_requisicao.set(consultas)
+        status_code = 500
+
+        async def enviar(mensagem):
+            nonlocal status_code
+            if mensagem["type"] == "http.response.start":
+                status_code = mensagem["status"]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _consultas_requisicao.reset(token)
+            duracao = time.perf_counter() - inicio
+            rota = getattr(scope.get("route"), "path", "nao_encontrada")
+            metodo = scope["method"]
+            requisicoes_duracao.observar(duracao, metodo, rota)
+            requisicoes_total.inc(metodo, rota, str(status_code))
+            requisicoes_consultas.observar(consultas.quantidade, metodo, rota)
+            requisicoes_tempo_db.observar(consultas.tempo_s, metodo, rota)
@@ -0,0 +1,265 @@
+import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from app.resources.config import settings
+from app.services.profiling import rss_bytes
+
+
+@dataclass(frozen=True)
+class VersaoModelo:
+    versao: str
+    caminho: str
+    carregado_em: datetime
+    tempo_carga_s: float
+    tamanho_arquivo_bytes: int
+    # Crescimento do RSS do processo durante a carga (None fora do Linux)
+    memoria_bytes: int | None
+    mmap: bool
+    preditor_compilado: bool = False
+
+
+@dataclass(frozen=True)
+class ModeloAtivo:
+    """Par (modelo, versão) trocado de uma vez só no registro."""
+    modelo: object
+    versao: VersaoModelo
+    # Caminho sem pandas para uma linha (app.services.inference), se conferido
+    preditor: object | None = None
+
+
+# Cargas refeitas quando o artefato é substituído no meio da leitura
+TENTATIVAS_CARGA = 3
+
+
+def _identidade(estado: os.stat_result) -> tuple:
+    # os.replace troca o inode; o mtime cobre quem reescreve no lugar
+    return estado.st_dev, estado.st_ino, estado.st_mtime_ns, estado.st_size
+
+
+def _hash_arquivo(caminho: str) -> str:
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(bloco)
+    return sha.hexdigest()[:12]
+
+
+def salvar_modelo(modelo, caminho: str, compress: int = 0) -> None:
+    """
+    Salva o artefato em um arquivo temporário único no mesmo diretório e o
+    move para o destino, para que leitores nunca encontrem um pickle pela
+    metade. Artefatos comprimidos não podem ser carregados com memory-map.
+    """
+    import joblib
+
+    diretorio, nome = os.path.split(os.path.abspath(caminho))
+    fd, tmp = tempfile.mkstemp(prefix=f"{nome}.", suffix=".tmp", dir=diretorio)
+    os.close(fd)
+    try:
+        joblib.dump(modelo, tmp, compress=compress)
+        # mkstemp cria com 0600
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, caminho)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+@contextmanager
+def trava_artefato(caminho: str):
+    """
+    Trava exclusiva entre processos (flock em `<caminho>.lock`). Com vários
+    workers cada um tem seu gerenciador de treinos; a trava garante que só
+    um treino por vez lê os dados, treina e promove o artefato.
+    """
+    with open(f"{caminho}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class ModelRegistry:
+    """
+    Mantém o modelo de preços carregado em memória.
+
+    O modelo ativo é substituído por atribuição de uma única referência
+    (`ModeloAtivo`), então uma predição em andamento sempre enxerga o par
+    modelo/versão completo que pegou no início.
+    """
+
+    def __init__(self, caminho: str, mmap: bool = False, historico: int = 10):
+        self.caminho = caminho
+        self.mmap = mmap
+        self.historico = historico
+        self._ativo: ModeloAtivo | None = None
+        self._versoes: list[VersaoModelo] = []
+        self._mtime: int | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def ativo(self) -> ModeloAtivo | None:
+        return self._ativo
+
+    @property
+    def versao_ativa(self) -> str | None:
+        ativo = self._ativo
+        return ativo.versao.versao if ativo else None
+
+    def versoes(self) -> list[VersaoModelo]:
+        return list(self._versoes)
+
+    def carregar(self, caminho: str | None = None) -> VersaoModelo:
+        """Carrega o artefato do disco e o torna o modelo ativo."""
+        # joblib e sklearn só entram no processo quando há modelo a carregar
+        import joblib
+        from app.services.inference import compilar_preditor
+
+        caminho = caminho or self.caminho
+        # Serializa cargas concorrentes; leituras não usam o lock
+        with self._lock:
+            # Hash e joblib.load abrem o arquivo separadamente: se um
+            # os.replace cair entre os dois, o modelo novo ficaria com a
+            # versão do antigo. O arquivo é conferido antes e depois, e a
+            # carga refeita se ele mudou.
+            for _ in range(TENTATIVAS_CARGA):
+                # mtime lido antes da carga, mas só registrado depois dela:
+                # uma carga que falha é tentada de novo pelo monitor
+                antes = os.stat(caminho)
+                versao = _hash_arquivo(caminho)
+                ativo = self._ativo
+                if ativo and ativo.versao.versao == versao:
+                    if _identidade(os.stat(caminho)) != _identidade(antes):
+                        continue
+                    if caminho == self.caminho:
+                        self._mtime = antes.st_mtime_ns
+                    return ativo.versao
+
+                # Delta de RSS, não tracemalloc: os nós das árvores são
+                # alocados em C, e o tracemalloc rastrearia todas as
+                # requisições em curso
+                memoria_antes = rss_bytes()
+                inicio = time.perf_counter()
+                modelo = joblib.load(caminho, mmap_mode="r" if self.mmap else None)
+                tempo_carga = time.perf_counter() - inicio
+                memoria_depois = rss_bytes()
+                if _identidade(os.stat(caminho)) == _identidade(antes):
+                    break
+                del modelo
+            else:
+                raise RuntimeError(
+                    f"Artefato {caminho} substituído durante {TENTATIVAS_CARGA} cargas seguidas"
+                )
+
+            preditor = compilar_preditor(modelo)
+
+            info = VersaoModelo(
+                versao=versao,
+                caminho=caminho,
+                carregado_em=datetime.now(timezone.utc),
+                tempo_carga_s=round(tempo_carga, 4),
+                tamanho_arquivo_bytes=antes.st_size,
+                memoria_bytes=(
+                    max(memoria_depois - memoria_antes, 0)
+                    if memoria_antes is not None else None
+                ),
+                mmap=self.mmap,
+                preditor_compilado=preditor is not None,
+            )
+            self._ativo = ModeloAtivo(modelo=modelo, versao=info, preditor=preditor)
+            self._versoes = [info, *self._versoes][: self.historico]
+            if caminho == self.caminho:
+                self._mtime = antes.st_mtime_ns
+
+        logging.info(
+            "Modelo %s carregado de %s em %.3fs", versao, caminho, tempo_carga
+        )
+        return info
+
+    def recarregar_se_mudou(self) -> VersaoModelo | None:
+        """
+        Recarrega o artefato se ele mudou em disco desde a última carga
+        (por exemplo, treinado por outro worker). Só olha o mtime; o hash é
+        calculado apenas quando ele muda.
+        """
+        try:
+            mtime = os.stat(self.caminho).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime == self._mtime:
+            return None
+        return self.carregar()
+
+
+registry = ModelRegistry(settings.modelo_caminho, mmap=settings.modelo_mmap)
+
+
+async def carregar_modelo():
+    """Carrega o modelo no startup, se o artefato já existir."""
+    if settings.modelo_carga_preguicosa:
+        logging.info("Carga preguiçosa: o modelo será carregado na primeira predição")
+        return
+    if not os.path.exists(registry.caminho):
+        logging.warning(
+            "Artefato %s não encontrado; treine o modelo via /train",
+            registry.caminho,
+        )
+        return
+    await asyncio.to_thread(registry.carregar)
+
+
+async def modelo_ativo() -> ModeloAtivo | None:
+    """
+    Modelo ativo. Se ainda não houver um (carga preguiçosa, ou artefato
+    criado depois do startup), carrega o artefato na primeira chamada.
+    """
+    ativo = registry.ativo
+    if ativo is None and os.path.exists(registry.caminho):
+        await asyncio.to_thread(registry.carregar)
+        ativo = registry.ativo
+    return ativo
+
+
+_monitor: asyncio.Task | None = None
+
+
+async def _monitorar_modelo(intervalo: float):
+    while True:
+        await asyncio.sleep(intervalo)
+        if registry.ativo is None and settings.modelo_carga_preguicosa:
+            continue
+        try:
+            await asyncio.to_thread(registry.recarregar_se_mudou)
+        except Exception:
+            logging.exception("Falha ao recarregar o modelo de %s", registry.caminho)
+
+
+async def iniciar_monitor_modelo():
+    """
+    Fora do `app.serve` (ex.: `uvicorn app.main:app`), pega artefatos
+    gravados por outro processo. No `app.serve` os workers não usam o
+    monitor: o processo principal os troca quando o artefato muda.
+    """
+    global _monitor
+    if settings.modelo_recarga_segundos > 0 and _monitor is None:
+        _monitor = asyncio.create_task(
+            _monitorar_modelo(settings.modelo_recarga_segundos)
+        )
+
+
+async def parar_monitor_modelo():
+    global _monitor
+    if _monitor is not None:
+        _monitor.cancel()
+        _monitor = None
@@ -0,0 +1,32 @@
+import hashlib
+import json
+import sys
+
+from app.resources.config import settings
+from app.services.cache import TTLCache
+
+
+def _tamanho(resultado: dict) -> int:
+    # chave (hex de 64 caracteres) + dict + valores
+    return (
+        sys.getsizeof("0" * 64)
+        + sys.getsizeof(resultado)
+        + sum(sys.getsizeof(v) for v in resultado.values())
+    )
+
+
+# hash do payload + versão do modelo -> resultado da predição
+prediction_cache = TTLCache(
+    maxsize=settings.predicao_cache_max_entradas,
+    sizeof=_tamanho,
+)
+
+
+def chave_predicao(payload: dict, versao: str) -> str:
+    """
+    Hash do payload normalizado (chaves ordenadas) junto com a versão do
+    modelo: um novo treino muda a versão e as entradas antigas deixam de
+    ser usadas, saindo do cache pelo LRU.
+    """
+    canonico = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{versao}:{canonico}".encode()).hexdigest()
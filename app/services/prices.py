@@ -0,0 +1,115 @@
+from datetime import date, datetime, timezone
+
+import sqlalchemy
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CategoryPriceDaily, Price, PriceDaily
+
+GRANULARIDADES = {"dia": "day", "semana": "week"}
+
+
+def _agregar(observacoes: list[tuple], coluna_chave: str, dia: date) -> list[dict]:
+    """(chave, preço) -> uma linha de agregado por chave, ordenadas pela chave."""
+    agregados = {}
+    for chave, preco in observacoes:
+        atual = agregados.get(chave)
+        if atual is None:
+            agregados[chave] = [1, preco, preco, preco]
+        else:
+            atual[0] += 1
+            atual[1] += preco
+            atual[2] = min(atual[2], preco)
+            atual[3] = max(atual[3], preco)
+    return [
+        {coluna_chave: chave, "dia": dia, "quantidade": q, "soma": s, "minimo": mn, "maximo": mx}
+        for chave, (q, s, mn, mx) in sorted(agregados.items())
+    ]
+
+
+async def _somar_agregados(session: AsyncSession, tabela, coluna_chave: str, linhas: list[dict]):
+    if not linhas:
+        return
+    stmt = pg_insert(tabela)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[coluna_chave, "dia"],
+        set_={
+            "quantidade": tabela.quantidade + stmt.excluded.quantidade,
+            "soma": tabela.soma + stmt.excluded.soma,
+            "minimo": sqlalchemy.func.least(tabela.minimo, stmt.excluded.minimo),
+            "maximo": sqlalchemy.func.greatest(tabela.maximo, stmt.excluded.maximo),
+        },
+    )
+    # Linhas ordenadas pela chave: transações concorrentes travam na mesma ordem
+    await session.execute(stmt, linhas)
+
+
+async def registrar_precos(session: AsyncSession, observacoes: list[tuple[str, str, float]]):
+    """
+    Grava as observações `(registration_id, category, preço)` em `data.prices`
+    e soma cada uma nos agregados diários por registro e por categoria.
+    Não faz commit.
+    """
+    if not observacoes:
+        return
+
+    await session.execute(
+        sqlalchemy.insert(Price),
+        [{"registration_id": rid, "price": preco} for rid, _, preco in observacoes],
+    )
+
+    # Mesmo dia do created_at (now()) das observações recém-inseridas
+    hoje = datetime.now(timezone.utc).date()
+    await _somar_agregados(
+        session, PriceDaily, "registration_id",
+        _agregar([(rid, preco) for rid, _, preco in observacoes], "registration_id", hoje),
+    )
+    await _somar_agregados(
+        session, CategoryPriceDaily, "category",
+        _agregar([(cat, preco) for _, cat, preco in observacoes], "category", hoje),
+    )
+
+
+async def historico(
+    session: AsyncSession,
+    tabela,
+    filtro,
+    granularidade: str,
+    inicio: date | None = None,
+    fim: date | None = None,
+) -> list[dict]:
+    """
+    Série de preços a partir dos agregados diários (`PriceDaily` ou
+    `CategoryPriceDaily`), reagrupada por semana quando pedido.
+    """
+    periodo = sqlalchemy.func.date_trunc(
+        GRANULARIDADES[granularidade], sqlalchemy.cast(tabela.dia, sqlalchemy.DateTime)
+    )
+    query = (
+        sqlalchemy.select(
+            periodo.label("periodo"),
+            sqlalchemy.func.sum(tabela.quantidade).label("quantidade"),
+            sqlalchemy.func.sum(tabela.soma).label("soma"),
+            sqlalchemy.func.min(tabela.minimo).label("minimo"),
+            sqlalchemy.func.max(tabela.maximo).label("maximo"),
+        )
+        .where(filtro)
+        .group_by(periodo)
+        .order_by(periodo)
+    )
+    if inicio:
+        query = query.where(tabela.dia >= inicio)
+    if fim:
+        query = query.where(tabela.dia <= fim)
+
+    result = await session.execute(query)
+    return [
+        {
+            "periodo": row.periodo.date(),
+            "quantidade": row.quantidade,
+            "media": round(row.soma / row.quantidade, 2),
+            "minimo": row.minimo,
+            "maximo": row.maximo,
+        }
+        for row in result
+    ]
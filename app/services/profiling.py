@@ -0,0 +1,97 @@
+import os
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+_PAGINA = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int | None:
+    """
+    RSS atual do processo (/proc/self/statm), ou None fora do Linux.
+    Ao contrário do tracemalloc, inclui memória alocada em C (ex.: os nós
+    das árvores do sklearn) e não tem custo para o resto do processo.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGINA
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def rss_pico_bytes() -> int:
+    """
+    Pico de RSS do processo. No Linux vem de VmHWM (/proc/self/status), que
+    recomeça no exec: o `ru_maxrss` de um processo criado com spawn herda o
+    pico do processo que o criou.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1]) * 1024
+    except (OSError, IndexError, ValueError):
+        pass
+    # ru_maxrss é em KiB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RegistroEtapas:
+    """
+    Mede tempo de relógio, tempo de CPU e pico de memória (tracemalloc)
+    de cada etapa de um processo, na ordem em que rodam.
+
+    O tracemalloc e o `process_time` valem para o processo inteiro: a
+    medição completa só é usada no processo de treino, que é isolado. Com
+    `isolado=False` (processo da API, com requisições concorrentes) mede só
+    o tempo de relógio, sem ligar o tracemalloc.
+    """
+
+    def __init__(self, isolado: bool = True):
+        self.isolado = isolado
+        self.etapas: list[dict] = []
+
+    @contextmanager
+    def etapa(self, nome: str):
+        """
+        Mede o bloco como a etapa `nome`. O dict devolvido aceita valores
+        extras (ex.: contagem de linhas) que entram no registro da etapa.
+        """
+        if not self.isolado:
+            extras = {}
+            inicio_wall = time.perf_counter()
+            try:
+                yield extras
+            finally:
+                self.etapas.append({
+                    "etapa": nome,
+                    "wall_s": round(time.perf_counter() - inicio_wall, 4),
+                    **extras,
+                })
+            return
+
+        ja_rastreando = tracemalloc.is_tracing()
+        if not ja_rastreando:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        memoria_inicial, _ = tracemalloc.get_traced_memory()
+        inicio_wall = time.perf_counter()
+        inicio_cpu = time.process_time()
+
+        extras = {}
+        try:
+            yield extras
+        finally:
+            wall = time.perf_counter() - inicio_wall
+            cpu = time.process_time() - inicio_cpu
+            _, pico = tracemalloc.get_traced_memory()
+            if not ja_rastreando:
+                tracemalloc.stop()
+            self.etapas.append({
+                "etapa": nome,
+                "wall_s": round(wall, 4),
+                "cpu_s": round(cpu, 4),
+                "pico_memoria_bytes": max(pico - memoria_inicial, 0),
+                **extras,
+            })
@@ -0,0 +1,73 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette import status
+
+from app.resources.config import settings
+from app.services.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    namespace: str
+    body: bytes
+    etag: str
+    headers: dict = field(default_factory=dict)
+
+
+response_cache = TTLCache(
+    maxsize=settings.response_cache_max_entradas,
+    ttl=settings.response_cache_ttl_segundos,
+    max_bytes=settings.response_cache_max_bytes,
+    sizeof=lambda entrada: len(entrada.body),
+)
+
+
+def _chave(namespace: str, request: Request) -> tuple:
+    return namespace, request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+
+def _etag_confere(request: Request, etag: str) -> bool:
+    valor = request.headers.get("if-none-match")
+    if not valor:
+        return False
+    if valor.strip() == "*":
+        return True
+    tags = {t.strip().removeprefix("W/") for t in valor.split(",")}
+    return etag in tags
+
+
+def _responder(request: Request, entrada: CachedResponse) -> Response:
+    headers = {**entrada.headers, "ETag": entrada.etag}
+    if _etag_confere(request, entrada.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        content=entrada.body, media_type="application/json", headers=headers
+    )
+
+
+def cached(namespace: str, request: Request) -> Response | None:
+    """Resposta em cache para a requisição (304 se o ETag conferir), ou None."""
+    entrada = response_cache.get(_chave(namespace, request))
+    if entrada is None:
+        return None
+    return _responder(request, entrada)
+
+
+def store(namespace: str, request: Request, conteudo, headers: dict | None = None) -> Response:
+    """Serializa `conteudo`, guarda no cache e responde com ETag."""
+    body = json.dumps(
+        jsonable_encoder(conteudo), ensure_ascii=False, separators=(",", ":")
+    ).encode()
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    entrada = CachedResponse(namespace, body, etag, dict(headers or {}))
+    response_cache.set(_chave(namespace, request), entrada)
+    return _responder(request, entrada)
+
+
+def invalidate(*namespaces: str):
+    """Descarta as respostas em cache dos namespaces (chamado nas escritas)."""
+    response_cache.invalidate_where(lambda entrada: entrada.namespace in namespaces)
@@ -1,5 +1,11 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
+from app.resources.config import settings
+
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -8,3 +14,94 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+class PasswordHashingBusy(Exception):
+    """Nenhuma vaga no executor de hashing dentro do tempo de espera."""
+
+
+class PasswordHasher:
+    """
+    Executa o Argon2 em um pool de threads dedicado (o argon2-cffi libera
+    o GIL), com no máximo `max_workers` operações simultâneas. Chamadas que
+    esperam mais de `timeout` segundos por uma vaga geram `PasswordHashingBusy`.
+    """
+
+    def __init__(self, max_workers: int, timeout: float):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor: ThreadPoolExecutor | None = None
+        self._vagas = asyncio.Semaphore(max_workers)
+        self.fila = 0
+        self.fila_max = 0
+        self.em_execucao = 0
+        self.rejeitadas = 0
+        self.operacoes = 0
+        self.tempo_total_s = 0.0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="argon2"
+            )
+        return self._executor
+
+    def shutdown(self):
+        """
+        Encerra as threads. A próxima operação cria um executor novo, o que
+        permite usar o hasher antes de um fork (as threads não são herdadas).
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._vagas = asyncio.Semaphore(self.max_workers)
+
+    async def _executar(self, func, *args):
+        self.fila += 1
+        self.fila_max = max(self.fila_max, self.fila)
+        try:
+            await asyncio.wait_for(self._vagas.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.rejeitadas += 1
+            raise PasswordHashingBusy()
+        finally:
+            self.fila -= 1
+
+        self.em_execucao += 1
+        inicio = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.tempo_total_s += time.perf_counter() - inicio
+            self.operacoes += 1
+            self.em_execucao -= 1
+            self._vagas.release()
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._executar(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._executar(get_password_hash, password)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "timeout_fila_s": self.timeout,
+            "fila": self.fila,
+            "fila_max": self.fila_max,
+            "em_execucao": self.em_execucao,
+            "operacoes": self.operacoes,
+            "rejeitadas": self.rejeitadas,
+            "tempo_medio_s": (
+                round(self.tempo_total_s / self.operacoes, 4)
+                if self.operacoes else None
+            ),
+        }
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.senha_max_workers,
+    timeout=settings.senha_timeout_fila_segundos,
+)
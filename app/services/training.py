@@ -0,0 +1,351 @@
+import logging
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.model_selection import ParameterSampler, cross_validate, train_test_split
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+from sklearn.impute import SimpleImputer
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from app.services.features import preparar_treino
+from app.services.model_registry import salvar_modelo
+from app.services.profiling import RegistroEtapas, rss_bytes, rss_pico_bytes
+
+# Tetos da floresta compacta, respeitados também pela busca de hiperparâmetros
+LIMITES_COMPACTA = {"n_estimators": 100, "max_depth": 20, "min_samples_leaf": 2}
+
+# Estimadores disponíveis em /train?estimador=...
+ESTIMADORES = {
+    # modelo original: maior precisão, artefato e latência maiores
+    "floresta": lambda: RandomForestRegressor(n_estimators=200, random_state=42),
+    # menos árvores e profundidade limitada: artefato e predição bem menores
+    "floresta_compacta": lambda: RandomForestRegressor(**LIMITES_COMPACTA, random_state=42),
+    "hist_gb": lambda: HistGradientBoostingRegressor(random_state=42),
+}
+
+# Espaço de busca do modo de busca de hiperparâmetros, por estimador
+ESPACO_BUSCA = {
+    "floresta": {
+        "model__n_estimators": [100, 200, 300, 500],
+        "model__max_depth": [None, 10, 20, 40],
+        "model__min_samples_leaf": [1, 2, 4, 8],
+        "model__max_features": [1.0, 0.5, "sqrt"],
+    },
+    # Nunca passa dos tetos de LIMITES_COMPACTA: o resultado continua compacto
+    "floresta_compacta": {
+        "model__n_estimators": [25, 50, 100],
+        "model__max_depth": [8, 12, 16, 20],
+        "model__min_samples_leaf": [2, 4, 8],
+        "model__max_features": [1.0, 0.5, "sqrt"],
+    },
+    "hist_gb": {
+        "model__learning_rate": [0.05, 0.1, 0.2],
+        "model__max_iter": [100, 200, 400],
+        "model__max_leaf_nodes": [15, 31, 63],
+        "model__min_samples_leaf": [10, 20, 40],
+    },
+}
+
+# Execuções de predição de uma linha no benchmark do artefato
+REPETICOES_BENCHMARK = 50
+
+# Fração das linhas de treino usada para estimar o custo do primeiro candidato
+FRACAO_SONDA = 0.1
+
+
+def _metricas(modelo, X, y) -> dict:
+    previsto = modelo.predict(X)
+    return {
+        "mae": round(float(mean_absolute_error(y, previsto)), 2),
+        "r2": round(float(r2_score(y, previsto)), 4),
+    }
+
+
+def _paralelo(model) -> dict:
+    """`n_jobs=-1` para estimadores que aceitam (o HistGB já usa todos os núcleos)."""
+    return {"n_jobs": -1} if "n_jobs" in model.get_params() else {}
+
+
+def _estimar_fit_s(modelo: Pipeline, X, y, fracao: float = FRACAO_SONDA) -> float:
+    """Tempo de um fit em `X` inteiro, extrapolado de um fit em uma amostra."""
+    n = min(len(X), max(int(len(X) * fracao), 50))
+    inicio = time.perf_counter()
+    clone(modelo).fit(X.iloc[:n], y.iloc[:n])
+    return (time.perf_counter() - inicio) * len(X) / n
+
+
+def buscar_hiperparametros(
+    regressor: Pipeline,
+    espaco: dict,
+    X_train,
+    y_train,
+    orcamento_s: float,
+    max_candidatos: int = 50,
+    cv: int = 3,
+) -> tuple[dict, list[dict]]:
+    """
+    Busca aleatória com validação cruzada, limitada pelo tempo de relógio.
+    O estimador usa todos os núcleos.
+
+    O orçamento inclui o fit final no conjunto de treino inteiro: um
+    candidato só é avaliado se o seu custo estimado (o do candidato
+    anterior; para o primeiro, um fit em `FRACAO_SONDA` das linhas) mais o
+    do fit final couberem no que resta. São estimativas, não um corte
+    rígido. Se nenhum candidato couber, retorna parâmetros vazios (os
+    padrões do estimador) e nenhum candidato.
+    Retorna os melhores parâmetros e o relatório de cada candidato.
+    """
+    paralelo = {f"model__{k}": v for k, v in _paralelo(regressor.named_steps["model"]).items()}
+    inicio = time.perf_counter()
+    sorteados = list(ParameterSampler(espaco, n_iter=max_candidatos, random_state=42))
+
+    # Fit no conjunto inteiro; a validação cruzada faz `cv` fits em
+    # (cv - 1)/cv das linhas
+    fit_total_s = _estimar_fit_s(
+        clone(regressor).set_params(**sorteados[0], **paralelo), X_train, y_train
+    )
+    proximo_s = fit_total_s * (cv - 1)
+    fits_medidos = []
+
+    candidatos = []
+    for params in sorteados:
+        decorrido = time.perf_counter() - inicio
+        # O fit final usa os parâmetros do vencedor, ainda desconhecido: vale
+        # o mais caro medido até aqui
+        refit_s = max(fits_medidos) if fits_medidos else fit_total_s
+        if decorrido + proximo_s + refit_s > orcamento_s:
+            break
+
+        t0 = time.perf_counter()
+        modelo = clone(regressor).set_params(**params, **paralelo)
+        scores = cross_validate(
+            modelo, X_train, y_train, cv=cv,
+            scoring=("neg_mean_absolute_error", "r2"),
+        )
+        proximo_s = time.perf_counter() - t0
+        fit_s = float(scores["fit_time"].mean())
+        fits_medidos.append(fit_s * cv / (cv - 1))
+        candidatos.append({
+            "params": {k.removeprefix("model__"): v for k, v in params.items()},
+            "cv_mae": round(float(-scores["test_neg_mean_absolute_error"].mean()), 2),
+            "cv_r2": round(float(scores["test_r2"].mean()), 4),
+            "fit_s": round(fit_s, 3),
+            "duracao_s": round(proximo_s, 3),
+        })
+
+    if not candidatos:
+        logging.info(
+            "Orçamento de %ss não comporta nenhum candidato; usando os parâmetros padrão",
+            orcamento_s,
+        )
+        return {}, []
+
+    melhor = min(candidatos, key=lambda c: c["cv_mae"])
+    params = {f"model__{k}": v for k, v in melhor["params"].items()}
+    return params, candidatos
+
+
+def _metricas_modelo_atual(caminho: str, X_test, y_test) -> dict | None:
+    """Métricas do artefato atual no mesmo conjunto de teste, se houver."""
+    if not os.path.exists(caminho):
+        return None
+    try:
+        return _metricas(joblib.load(caminho), X_test, y_test)
+    except Exception:
+        # artefato de outra versão das features: não serve de comparação
+        logging.exception("Não foi possível avaliar o modelo atual")
+        return None
+
+
+def _latencias_ms(func, repeticoes: int) -> list[float]:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def _medir_artefato(caminho: str, X_test: pd.DataFrame) -> dict:
+    """
+    Executado em um processo novo (ver `benchmark_artefato`): a base de
+    memória já inclui as bibliotecas e `X_test`, então o que cresce depois
+    é o custo de carregar e servir o artefato.
+    """
+    base = rss_bytes()
+    inicio = time.perf_counter()
+    modelo = joblib.load(caminho)
+    tempo_carga = time.perf_counter() - inicio
+    carregado = rss_bytes()
+
+    linha = X_test.iloc[[0]]
+    modelo.predict(linha)  # aquecimento
+    uma_linha = _latencias_ms(lambda: modelo.predict(linha), REPETICOES_BENCHMARK)
+    lote = _latencias_ms(lambda: modelo.predict(X_test), 3)
+    lote_ms = statistics.median(lote)
+
+    return {
+        "tamanho_bytes": os.path.getsize(caminho),
+        "tempo_carga_s": round(tempo_carga, 4),
+        "memoria_modelo_bytes": carregado - base if base is not None else None,
+        "rss_pico_bytes": rss_pico_bytes() - base if base is not None else None,
+        "latencia_uma_linha_ms": {
+            "p50": round(statistics.median(uma_linha), 3),
+            "p95": round(float(np.percentile(uma_linha, 95)), 3),
+        },
+        "latencia_lote_ms": round(lote_ms, 3),
+        "linhas_lote": len(X_test),
+        "latencia_por_linha_lote_us": round(lote_ms * 1000 / max(len(X_test), 1), 3),
+    }
+
+
+def benchmark_artefato(caminho: str, X_test: pd.DataFrame) -> dict:
+    """
+    Custo de servir o artefato: tamanho em disco, tempo de carga, memória
+    ocupada pelo modelo carregado (crescimento do RSS), pico de RSS acima
+    da base e latência de predição de uma linha e do lote de teste inteiro.
+
+    Mede em um processo novo e de vida curta: no processo do pool de treino,
+    o RSS carrega os treinos anteriores, a validação cruzada e os DataFrames,
+    e os números não seriam comparáveis entre estimadores.
+    """
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return executor.submit(_medir_artefato, caminho, X_test).result()
+
+
+def treinar(
+    df: pd.DataFrame,
+    caminho: str,
+    busca: bool = False,
+    orcamento_s: float = 300,
+    estimador: str = "floresta",
+    compressao: int = 3,
+) -> dict:
+    """
+    Treina o regressor de preços e grava o artefato em `caminho`.
+
+    Executado em um processo do pool de treino, fora do event loop; por isso
+    recebe apenas dados serializáveis e devolve um dicionário simples.
+    Cada etapa é medida (tempo, CPU, memória) e listada em `etapas`.
+
+    Com `busca=True`, os hiperparâmetros são escolhidos por busca aleatória
+    dentro de `orcamento_s` segundos (fit final incluído), e o modelo só é promovido (gravado)
+    se tiver MAE menor que o modelo atual em `X_test`.
+
+    `estimador` é uma das chaves de `ESTIMADORES`. O artefato é gravado com
+    compressão `compressao` (0 desativa, necessário para memory-map) e
+    recebe um benchmark de custo de serviço (`benchmark_artefato`).
+    """
+    if df.empty:
+        raise ValueError("Não há dados suficientes para treinar o modelo")
+    if estimador not in ESTIMADORES:
+        raise ValueError(f"Estimador desconhecido: {estimador}")
+
+    registro = RegistroEtapas()
+
+    with registro.etapa("preparar_features") as info:
+        X, y = preparar_treino(df)
+        info.update({"linhas": len(X), "features": X.shape[1]})
+
+    # Split
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42
+    )
+
+    # Identificar colunas
+    numeric_features = X.select_dtypes(include=["int64", "float64"]).columns.tolist()
+    categorical_features = X.select_dtypes(include=["object", "category"]).columns.tolist()
+
+    model = ESTIMADORES[estimador]()
+
+    # Transformadores
+    # As árvores do sklearn trabalham em float32; o one-hot já sai nesse tipo.
+    # O HistGB não aceita matriz esparsa.
+    numeric_transformer = SimpleImputer(strategy="median")
+    categorical_transformer = Pipeline(steps=[
+        ("imputer", SimpleImputer(strategy="most_frequent")),
+        ("encoder", OneHotEncoder(
+            handle_unknown="ignore",
+            dtype=np.float32,
+            sparse_output=not isinstance(model, HistGradientBoostingRegressor),
+        ))
+    ])
+
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ("num", numeric_transformer, numeric_features),
+            ("cat", categorical_transformer, categorical_features)
+        ]
+    )
+
+    resultado = {"linhas": len(X), "features": X.shape[1], "estimador": estimador}
+
+    if busca:
+        with registro.etapa("busca") as info:
+            params, candidatos = buscar_hiperparametros(
+                Pipeline(steps=[("preprocessor", preprocessor), ("model", model)]),
+                ESPACO_BUSCA[estimador], X_train, y_train, orcamento_s,
+            )
+            info["candidatos"] = len(candidatos)
+        melhores = {k.removeprefix("model__"): v for k, v in params.items()}
+        model.set_params(**melhores, **_paralelo(model))
+        resultado["busca"] = {
+            "orcamento_s": orcamento_s,
+            "melhores_params": melhores,
+            "candidatos": candidatos,
+        }
+
+    # Pré-processamento e fit medidos separadamente; o Pipeline é montado
+    # com os passos já treinados
+    with registro.etapa("pre_processamento") as info:
+        Xt_train = preprocessor.fit_transform(X_train)
+        info.update({"linhas": Xt_train.shape[0], "colunas": Xt_train.shape[1]})
+
+    with registro.etapa("fit") as info:
+        model.fit(Xt_train, y_train)
+        info["linhas"] = Xt_train.shape[0]
+    # Predição sequencial no artefato: sem pool de threads a cada chamada e
+    # árvores sempre somadas na mesma ordem (ver app.services.inference)
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=None)
+
+    regressor = Pipeline(steps=[
+        ("preprocessor", preprocessor),
+        ("model", model)
+    ])
+
+    with registro.etapa("avaliacao") as info:
+        resultado["metricas_teste"] = _metricas(regressor, X_test, y_test)
+        info["linhas"] = len(X_test)
+        if busca:
+            atual = _metricas_modelo_atual(caminho, X_test, y_test)
+            resultado["metricas_teste_modelo_atual"] = atual
+
+    resultado["etapas"] = registro.etapas
+
+    if busca and atual is not None and resultado["metricas_teste"]["mae"] >= atual["mae"]:
+        logging.info("Modelo da busca não supera o atual; mantendo %s", caminho)
+        resultado["promovido"] = False
+        return resultado
+
+    # Salvar modelo
+    with registro.etapa("salvar_modelo") as info:
+        salvar_modelo(regressor, caminho, compress=compressao)
+        info["tamanho_bytes"] = os.path.getsize(caminho)
+    logging.info("Modelo de regressão salvo como %s", caminho)
+    resultado["promovido"] = True
+
+    with registro.etapa("benchmark"):
+        resultado["benchmark"] = benchmark_artefato(caminho, X_test)
+
+    return resultado
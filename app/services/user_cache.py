@@ -0,0 +1,25 @@
+from sqlalchemy import event
+
+from app.models import User
+from app.resources.config import settings
+from app.services.cache import TTLCache
+
+# token -> UserResponse (claims já validados + flag `disabled`)
+user_cache = TTLCache(
+    maxsize=settings.auth_cache_max_entradas,
+    ttl=settings.auth_cache_ttl_segundos,
+)
+
+
+def invalidar_usuario(user_id: str):
+    """Remove do cache todos os tokens do usuário."""
+    user_cache.invalidate_where(lambda u: u.id == user_id)
+
+
+# Alterações feitas pelo ORM (desativar usuário, trocar e-mail etc.)
+# invalidam o cache automaticamente. UPDATEs escritos direto em SQL
+# precisam chamar `invalidar_usuario`.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidar_apos_alteracao(mapper, connection, target):
+    invalidar_usuario(target.id)
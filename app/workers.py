@@ -0,0 +1,51 @@
+"""
+Conjunto de workers do `app.serve`: os ativos, os substituídos por uma
+troca de modelo que ainda estão terminando as requisições (e o treino em
+andamento), e quais devem ser recriados ao sair. O fork e o envio de
+sinais são recebidos prontos, para que o conjunto não dependa do uvicorn.
+"""
+import signal
+from typing import Callable
+
+
+class ConjuntoWorkers:
+    def __init__(self, criar: Callable[[], int], sinalizar: Callable[[int, int], None]):
+        self._criar = criar
+        self._sinalizar = sinalizar
+        self.workers: set[int] = set()
+        # Workers antigos em encerramento gracioso após a troca do modelo
+        self.substituidos: set[int] = set()
+
+    @property
+    def ativos(self) -> set[int]:
+        return self.workers - self.substituidos
+
+    def iniciar(self) -> int:
+        pid = self._criar()
+        self.workers.add(pid)
+        return pid
+
+    def trocar(self):
+        """
+        Substitui cada worker ativo por um novo fork. Os que ainda estão
+        saindo de uma troca anterior não são substituídos de novo.
+        """
+        for pid in sorted(self.ativos):
+            self.substituidos.add(pid)
+            self.iniciar()
+            # SIGTERM: o uvicorn termina as requisições em andamento (e o
+            # worker espera o treino em andamento) antes de sair
+            self._sinalizar(pid, signal.SIGTERM)
+
+    def encerrar(self):
+        # Os substituídos já receberam SIGTERM
+        for pid in self.ativos:
+            self._sinalizar(pid, signal.SIGTERM)
+
+    def terminou(self, pid: int) -> bool:
+        """Retira o worker que saiu; True se ele deve ser recriado."""
+        self.workers.discard(pid)
+        if pid in self.substituidos:
+            self.substituidos.discard(pid)
+            return False
+        return True
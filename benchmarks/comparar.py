@@ -0,0 +1,70 @@
+"""
+Compara dois resultados de `executar.py` (por exemplo, antes e depois de
+uma mudança) e mostra a variação de latência, vazão e memória por cenário.
+
+    python benchmarks/comparar.py benchmarks/resultados/abc123.json benchmarks/resultados/def456.json
+"""
+import argparse
+import json
+from pathlib import Path
+
+METRICAS = [
+    ("p50 ms", lambda c: c.get("latencia_ms", {}).get("p50")),
+    ("p95 ms", lambda c: c.get("latencia_ms", {}).get("p95")),
+    ("p99 ms", lambda c: c.get("latencia_ms", {}).get("p99")),
+    ("req/s", lambda c: c.get("vazao_rps")),
+    ("duração s", lambda c: c.get("duracao_s")),
+    ("RSS MB", lambda c: c.get("rss_pico_mb")),
+]
+
+
+def _variacao(antes, depois) -> str:
+    if antes in (None, 0) or depois is None:
+        return ""
+    return f"{(depois - antes) / antes * 100:+.1f}%"
+
+
+def comparar(base: dict, novo: dict) -> list[dict]:
+    linhas = []
+    for cenario in sorted(set(base["cenarios"]) | set(novo["cenarios"])):
+        antes = base["cenarios"].get(cenario, {})
+        depois = novo["cenarios"].get(cenario, {})
+        for nome, extrair in METRICAS:
+            a, d = extrair(antes), extrair(depois)
+            if a is None and d is None:
+                continue
+            linhas.append({
+                "cenario": cenario, "metrica": nome,
+                "base": a, "novo": d, "variacao": _variacao(a, d),
+            })
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara dois resultados de benchmark")
+    parser.add_argument("base", type=Path)
+    parser.add_argument("novo", type=Path)
+    parser.add_argument("--json", action="store_true", help="saída em JSON")
+    args = parser.parse_args()
+
+    base = json.loads(args.base.read_text())
+    novo = json.loads(args.novo.read_text())
+    linhas = comparar(base, novo)
+
+    if args.json:
+        print(json.dumps(linhas, indent=2, ensure_ascii=False))
+        return
+
+    print(f"base: {base['meta'].get('commit')}  novo: {novo['meta'].get('commit')}")
+    print(f"{'cenário':<16}{'métrica':<12}{'base':>12}{'novo':>12}{'variação':>11}")
+    for linha in linhas:
+        base_txt = "-" if linha["base"] is None else f"{linha['base']:.2f}"
+        novo_txt = "-" if linha["novo"] is None else f"{linha['novo']:.2f}"
+        print(
+            f"{linha['cenario']:<16}{linha['metrica']:<12}"
+            f"{base_txt:>12}{novo_txt:>12}{linha['variacao']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Benchmark da API, executado no próprio processo (httpx + ASGITransport).
+
+Sobe a aplicação com o lifespan real (precisa do Postgres configurado no
+`.env`), popula o banco com o catálogo sintético de `gerador.py` e mede
+cada cenário: vazão, latências p50/p95/p99 e pico de RSS. O resultado é
+gravado em JSON (com o commit atual) para comparação com `comparar.py`.
+
+    python benchmarks/executar.py --quantidade 10000
+    python benchmarks/executar.py --quantidade 1000000 --sem-treino
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from benchmarks.gerador import gerar_catalogo, gerar_predicao  # noqa: E402
+
+TAMANHO_BLOCO_INGESTAO = 1000
+
+
+def _percentil(valores: list[float], p: float) -> float | None:
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(int(len(ordenados) * p / 100), len(ordenados) - 1)]
+
+
+def _rss_pico_mb() -> float:
+    # ru_maxrss é em KiB no Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def medir(requisicoes, concorrencia: int, itens_por_requisicao: int = 1) -> dict:
+    """
+    Executa as corrotinas de `requisicoes` (fábricas sem argumentos que
+    devolvem uma `httpx.Response`) com no máximo `concorrencia` em paralelo.
+    """
+    latencias = []
+    erros = 0
+    fila = iter(requisicoes)
+
+    async def trabalhador():
+        nonlocal erros
+        for fabrica in fila:
+            inicio = time.perf_counter()
+            resposta = await fabrica()
+            latencias.append(time.perf_counter() - inicio)
+            if resposta.status_code >= 400:
+                erros += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+
+    ms = [v * 1000 for v in latencias]
+    return {
+        "requisicoes": len(latencias),
+        "erros": erros,
+        "duracao_s": round(duracao, 3),
+        "vazao_rps": round(len(latencias) / duracao, 2) if duracao else None,
+        "vazao_itens_s": round(len(latencias) * itens_por_requisicao / duracao, 2) if duracao else None,
+        "latencia_ms": {
+            "p50": _percentil(ms, 50),
+            "p95": _percentil(ms, 95),
+            "p99": _percentil(ms, 99),
+            "max": max(ms) if ms else None,
+        },
+        "rss_pico_mb": _rss_pico_mb(),
+    }
+
+
+def _blocos_ndjson(catalogo, tamanho: int):
+    bloco = []
+    for registro in catalogo:
+        bloco.append(json.dumps(registro, ensure_ascii=False))
+        if len(bloco) >= tamanho:
+            yield "\n".join(bloco).encode()
+            bloco = []
+    if bloco:
+        yield "\n".join(bloco).encode()
+
+
+async def _token(client, settings) -> dict:
+    resposta = await client.post(
+        "/api/v1/token",
+        data={"username": settings.first_login, "password": settings.first_password},
+    )
+    resposta.raise_for_status()
+    return {"Authorization": f"Bearer {resposta.json()['access_token']}"}
+
+
+async def _treinar(client, auth: dict, intervalo: float = 1.0) -> dict:
+    inicio = time.perf_counter()
+    resposta = await client.post("/api/v1/modelo/train", headers=auth)
+    resposta.raise_for_status()
+    job = resposta.json()
+    while job["status"] in ("pendente", "executando"):
+        await asyncio.sleep(intervalo)
+        job = (await client.get(f"/api/v1/modelo/train/jobs/{job['id']}", headers=auth)).json()
+    return {
+        "status": job["status"],
+        "duracao_s": round(time.perf_counter() - inicio, 3),
+        "linhas": (job.get("resultado") or {}).get("linhas"),
+        "etapas": {
+            e["etapa"]: e["wall_s"] for e in (job.get("resultado") or {}).get("etapas", [])
+        },
+        "erro": job.get("erro"),
+        "rss_pico_mb": _rss_pico_mb(),
+    }
+
+
+async def executar(args) -> dict:
+    from app.main import create_app
+    from app.resources.config import settings
+
+    app = create_app()
+    rng = random.Random(args.semente)
+    prefixo = args.prefixo or f"bench-{int(time.time())}"
+    cenarios = {}
+
+    async with app.router.lifespan_context(app):
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transporte, base_url="http://benchmark", timeout=None
+        ) as client:
+            auth = await _token(client, settings)
+
+            cenarios["token"] = await medir(
+                (lambda: client.post(
+                    "/api/v1/token",
+                    data={"username": settings.first_login, "password": settings.first_password},
+                ) for _ in range(args.logins)),
+                args.concorrencia,
+            )
+
+            ndjson = {**auth, "Content-Type": "application/x-ndjson"}
+            cenarios["ingestao_bulk"] = await medir(
+                ((lambda corpo=corpo: client.post("/api/v1/data/bulk/ndjson", content=corpo, headers=ndjson))
+                 for corpo in _blocos_ndjson(
+                     gerar_catalogo(args.quantidade, args.semente, prefixo),
+                     TAMANHO_BLOCO_INGESTAO,
+                 )),
+                1,
+                itens_por_requisicao=TAMANHO_BLOCO_INGESTAO,
+            )
+
+            novos = gerar_catalogo(args.requisicoes, args.semente + 1, f"{prefixo}-post")
+            cenarios["criar"] = await medir(
+                ((lambda r=r: client.post("/api/v1/data/", json=r, headers=auth)) for r in novos),
+                args.concorrencia,
+            )
+
+            cursores = [None]
+
+            async def proxima_pagina():
+                params = {"limit": 50}
+                if cursores[-1]:
+                    params["cursor"] = cursores[-1]
+                resposta = await client.get("/api/v1/data/", params=params, headers=auth)
+                cursores.append(resposta.headers.get("x-next-cursor"))
+                return resposta
+
+            cenarios["listar"] = await medir(
+                (proxima_pagina for _ in range(args.requisicoes)), 1
+            )
+
+            if not args.sem_treino:
+                cenarios["treino"] = await _treinar(client, auth)
+
+            payloads = [gerar_predicao(rng) for _ in range(args.requisicoes)]
+            cenarios["predicao"] = await medir(
+                ((lambda p=p: client.post("/api/v1/modelo/predict_hybrid", json=p, headers=auth))
+                 for p in payloads),
+                args.concorrencia,
+            )
+            # Mesmos payloads: agora saem do cache de predições
+            cenarios["predicao_cache"] = await medir(
+                ((lambda p=p: client.post("/api/v1/modelo/predict_hybrid", json=p, headers=auth))
+                 for p in payloads),
+                args.concorrencia,
+            )
+
+    return {
+        "meta": {
+            "commit": _commit(),
+            "executado_em": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "quantidade": args.quantidade,
+            "requisicoes": args.requisicoes,
+            "concorrencia": args.concorrencia,
+            "semente": args.semente,
+        },
+        "cenarios": cenarios,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da API em processo")
+    parser.add_argument("--quantidade", type=int, default=1000, help="celulares ingeridos (1k a 1M)")
+    parser.add_argument("--requisicoes", type=int, default=200, help="requisições por cenário")
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--prefixo", help="prefixo dos nomes (padrão: único por execução)")
+    parser.add_argument("--sem-treino", action="store_true")
+    parser.add_argument("--saida", type=Path, help="arquivo JSON (padrão: benchmarks/resultados/<commit>.json)")
+    args = parser.parse_args()
+
+    resultado = asyncio.run(executar(args))
+
+    saida = args.saida or RAIZ / "benchmarks" / "resultados" / f"{resultado['meta']['commit'] or 'local'}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False))
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    print(f"Resultado gravado em {saida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
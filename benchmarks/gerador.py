@@ -0,0 +1,187 @@
+"""
+Gerador de catálogo sintético de celulares.
+
+Produz payloads de `Register` (com `Item` no formato dos scrapers: preços
+"R$ 1.234,56", resoluções "1080 x 2400 pixel", pesos "195 g" etc.) e de
+`Celular` para predição. O preço é derivado das especificações, para que o
+treino tenha sinal. Tudo é determinístico a partir da semente.
+
+    python benchmarks/gerador.py --quantidade 100000 > catalogo.ndjson
+"""
+import argparse
+import json
+import random
+import sys
+from typing import Iterator
+
+MARCAS = {
+    "samsung": {
+        "modelos": ["Galaxy A", "Galaxy M", "Galaxy S", "Galaxy Z Flip"],
+        "chipsets": ["SAMSUNG Exynos 850", "SAMSUNG Exynos 1380", "Qualcomm Snapdragon 8 Gen 2"],
+        "sistemas": ["Android 13 Samsung One UI 5.1", "Android 14 Samsung One UI 6"],
+        "gpus": ["Mali-G52", "Mali-G68", "Adreno 740"],
+        "fator": 1.0,
+    },
+    "apple": {
+        "modelos": ["iPhone", "iPhone Pro", "iPhone Pro Max", "iPhone SE"],
+        "chipsets": ["T8101 Apple A14 Bionic", "T8120 Apple A16 Bionic", "T8130 Apple A17 Pro"],
+        "sistemas": ["iOS 16", "iOS 17"],
+        "gpus": ["Apple GPU (4-core graphics)", "Apple GPU (5-core graphics)"],
+        "fator": 1.8,
+    },
+    "motorola": {
+        "modelos": ["Moto G", "Moto E", "Edge"],
+        "chipsets": ["MediaTek Helio G85", "Qualcomm Snapdragon 695", "MediaTek Dimensity 7030"],
+        "sistemas": ["Android 13", "Android 14"],
+        "gpus": ["Mali-G52", "Adreno 619", "Mali-G610"],
+        "fator": 0.8,
+    },
+    "xiaomi": {
+        "modelos": ["Redmi Note", "Redmi", "Poco X", "Xiaomi"],
+        "chipsets": ["MediaTek Helio G99", "Qualcomm Snapdragon 7s Gen 2", "MediaTek Dimensity 8200"],
+        "sistemas": ["Android 13 MIUI 14", "Android 14 HyperOS"],
+        "gpus": ["Mali-G57", "Adreno 710", "Mali-G610"],
+        "fator": 0.75,
+    },
+}
+TELAS = ["IPS LCD", "TFT LCD", "Super AMOLED", "Dynamic AMOLED 2X", "Super Retina XDR OLED"]
+RESOLUCOES = [(720, 1600), (1080, 2400), (1080, 2340), (1170, 2532), (1440, 3088)]
+CAMERAS = [(13, "4160 x 3120"), (50, "8160 x 6120"), (12, "4000 x 3000"), (108, "12000 x 9000")]
+MEMORIAS_RAM = [2, 3, 4, 6, 8, 12]
+ARMAZENAMENTOS = [32, 64, 128, 256, 512]
+
+
+def formatar_preco(valor: float) -> str:
+    """1234.5 -> "R$ 1.234,50"."""
+    texto = f"{valor:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+    return f"R$ {texto}"
+
+
+def _decimal(valor: float, casas: int = 1) -> str:
+    return f"{valor:.{casas}f}".replace(".", ",")
+
+
+def _especificacoes(rng: random.Random, marca: str) -> dict:
+    info = MARCAS[marca]
+    ram = rng.choice(MEMORIAS_RAM)
+    armazenamento = rng.choice(ARMAZENAMENTOS)
+    largura, altura = rng.choice(RESOLUCOES)
+    megapixel, resolucao_camera = rng.choice(CAMERAS)
+    tela = round(rng.uniform(5.4, 6.9), 1)
+    return {
+        "marca": marca,
+        "modelo": rng.choice(info["modelos"]),
+        "ram": ram,
+        "armazenamento": armazenamento,
+        "largura": largura,
+        "altura": altura,
+        "tela": tela,
+        "densidade": round((largura**2 + altura**2) ** 0.5 / tela),
+        "fps": rng.choice([60, 90, 120, 144]),
+        "bateria": rng.randrange(2800, 6001, 50),
+        "peso": rng.randrange(140, 241),
+        "megapixel": megapixel,
+        "resolucao_camera": resolucao_camera,
+        "chipset": rng.choice(info["chipsets"]),
+        "sistema": rng.choice(info["sistemas"]),
+        "gpu": rng.choice(info["gpus"]),
+        "tela_tipo": rng.choice(TELAS),
+        "meses": rng.randrange(1, 48),
+    }
+
+
+def _preco(rng: random.Random, e: dict) -> float:
+    base = 300 + 180 * e["ram"] + 4 * e["armazenamento"] + 6 * e["megapixel"] + 3 * e["fps"]
+    base *= MARCAS[e["marca"]]["fator"] * (1 - min(e["meses"], 36) / 100)
+    return max(base * rng.uniform(0.85, 1.15), 199.0)
+
+
+def gerar_celular(indice: int, rng: random.Random, prefixo: str = "bench") -> dict:
+    """Payload de `Register` com nome único para `indice`."""
+    marca = rng.choice(list(MARCAS))
+    e = _especificacoes(rng, marca)
+    preco = _preco(rng, e)
+    precos = [formatar_preco(preco * rng.uniform(0.95, 1.05)) for _ in range(rng.randint(1, 4))]
+    ano = 2024 - e["meses"] // 12
+    mes = 12 - e["meses"] % 12
+    return {
+        "name": f"{prefixo} {marca} {e['modelo']} {indice}",
+        "category": marca,
+        "status": 1,
+        "url": f"https://example.com/{prefixo}/{indice}",
+        "source": "benchmark",
+        "release_date": f"{ano}/{(mes - 1) // 4 + 1}",
+        "data": {
+            "sistema_operacional": e["sistema"],
+            "disponibilidade": f"{ano}-{mes:02d}-01",
+            "dimensoes": f"{_decimal(rng.uniform(140, 170))} x {_decimal(rng.uniform(65, 78))} x {_decimal(rng.uniform(7, 9.5))} mm",
+            "peso": f"{e['peso']} g",
+            "processador": f"8x {_decimal(rng.uniform(1.8, 3.2))} GHz",
+            "memoria_ram": f"{e['ram']} GB",
+            "chipset": e["chipset"],
+            "gpu": e["gpu"],
+            "memoria_max": f"{e['armazenamento']} GB",
+            "memoria_expansivel": rng.choice(["Sim", "Não"]),
+            "tela_tamanho": f"{_decimal(e['tela'])} polegadas",
+            "tela_resolucao": f"{e['largura']} x {e['altura']} pixel",
+            "tela_densidade_pixels": f"{e['densidade']} ppi",
+            "tela_tipo": e["tela_tipo"],
+            "tela_fps": f"{e['fps']} Hz",
+            "bateria_carga": f"{e['bateria']} mAh",
+            "bateria_tipo": rng.choice(["Litio", "Litio-Polimero"]),
+            "camera_megapixel": f"{e['megapixel']} MP",
+            "camera_resolucao": f"{e['resolucao_camera']} pixel",
+            "resistencia_agua": rng.choice(["IP67", "IP68", ""]),
+            "preco_medio": None,
+            "precos": precos,
+        },
+    }
+
+
+def gerar_catalogo(quantidade: int, semente: int = 42, prefixo: str = "bench") -> Iterator[dict]:
+    """`quantidade` payloads de `Register`, gerados sob demanda."""
+    rng = random.Random(semente)
+    for indice in range(quantidade):
+        yield gerar_celular(indice, rng, prefixo)
+
+
+def gerar_predicao(rng: random.Random) -> dict:
+    """Payload de `Celular` (campos já numéricos) para /predict_hybrid."""
+    marca = rng.choice(list(MARCAS))
+    e = _especificacoes(rng, marca)
+    return {
+        "memoria_ram": float(e["ram"]),
+        "memoria_max": float(e["armazenamento"]),
+        "tela_largura": e["largura"],
+        "tela_altura": e["altura"],
+        "tela_densidade_pixels": float(e["densidade"]),
+        "bateria_carga": float(e["bateria"]),
+        "camera_megapixel": float(e["megapixel"]),
+        "bateria_tipo": "Litio",
+        "camera_resolucao": f"{e['resolucao_camera']} pixel",
+        "disponibilidade": float(e["meses"]),
+        "chipset": e["chipset"],
+        "sistema_operacional": e["sistema"],
+        "processador": "8x 2,4 GHz",
+        "dimensoes": "160,0 x 75,0 x 8,0 mm",
+        "peso": float(e["peso"]),
+        "tela_tamanho": e["tela"],
+        "tela_tipo": e["tela_tipo"],
+        "gpu": e["gpu"],
+        "tela_fps": float(e["fps"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um catálogo sintético em NDJSON")
+    parser.add_argument("--quantidade", type=int, default=1000)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--prefixo", default="bench")
+    args = parser.parse_args()
+
+    for registro in gerar_catalogo(args.quantidade, args.semente, args.prefixo):
+        sys.stdout.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Orçamento de tempo de import e de startup da API.
+
+Cada medição roda em um processo novo (cold start) e importa `app.main`.
+O script falha (código 1) se o tempo, a memória ou os módulos carregados
+passarem do orçamento: o stack de ML (sklearn, joblib, matplotlib) não pode
+ser carregado pelo import da API. No startup ele só entra para carregar um
+artefato existente (ou nunca, com MODELO_CARGA_PREGUICOSA=true).
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --startup   # também roda o startup (precisa do Postgres)
+
+As variáveis obrigatórias de `Settings` recebem valores de exemplo quando
+não estiverem definidas.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+MODULOS_PROIBIDOS = ["sklearn", "joblib", "matplotlib"]
+
+AMBIENTE_PADRAO = {
+    "DATABASE_HOSTNAME": "localhost",
+    "DATABASE_PORT": "5432",
+    "DATABASE_NAME": "melhorpreco_dev",
+    "DATABASE_USERNAME": "admin",
+    "DATABASE_PASSWORD": "admin",
+    "JWT_SECRET_KEY": "benchmark",
+    "FIRST_LOGIN": "admin",
+    "FIRST_PASSWORD": "admin",
+    "FIRST_EMAIL": "admin@example.com",
+    "ENVIRONMENT": "development",
+}
+
+MEDICAO = """
+import asyncio, json, resource, sys, time
+inicio = time.perf_counter()
+import app.main
+import_s = time.perf_counter() - inicio
+modulos = {{m: m in sys.modules for m in {proibidos!r}}}
+startup_s = None
+if {startup}:
+    async def subir():
+        async with app.main.app.router.lifespan_context(app.main.app):
+            pass
+    inicio = time.perf_counter()
+    asyncio.run(subir())
+    startup_s = time.perf_counter() - inicio
+print(json.dumps({{
+    "import_s": import_s,
+    "startup_s": startup_s,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modulos": modulos,
+}}))
+"""
+
+
+def medir(startup: bool) -> dict:
+    env = {**AMBIENTE_PADRAO, **os.environ}
+    codigo = MEDICAO.format(startup=startup, proibidos=MODULOS_PROIBIDOS)
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo],
+        cwd=RAIZ, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--max-import-s", type=float, default=2.0)
+    parser.add_argument("--max-startup-s", type=float, default=3.0)
+    parser.add_argument("--max-rss-mb", type=float, default=150.0)
+    parser.add_argument("--startup", action="store_true")
+    args = parser.parse_args()
+
+    medicoes = [medir(args.startup) for _ in range(args.repeticoes)]
+    resultado = {
+        "import_s": statistics.median(m["import_s"] for m in medicoes),
+        "rss_mb": statistics.median(m["rss_mb"] for m in medicoes),
+        "modulos_carregados": sorted(
+            {nome for m in medicoes for nome, carregado in m["modulos"].items() if carregado}
+        ),
+    }
+    if args.startup:
+        resultado["startup_s"] = statistics.median(m["startup_s"] for m in medicoes)
+
+    falhas = []
+    if resultado["import_s"] > args.max_import_s:
+        falhas.append(f"import {resultado['import_s']:.3f}s > {args.max_import_s}s")
+    if resultado["rss_mb"] > args.max_rss_mb:
+        falhas.append(f"RSS {resultado['rss_mb']:.1f} MB > {args.max_rss_mb} MB")
+    if args.startup and resultado["startup_s"] > args.max_startup_s:
+        falhas.append(f"startup {resultado['startup_s']:.3f}s > {args.max_startup_s}s")
+    if resultado["modulos_carregados"]:
+        falhas.append(f"módulos de ML carregados: {', '.join(resultado['modulos_carregados'])}")
+
+    resultado["falhas"] = falhas
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import os
+
+# Settings exige estas variáveis; os testes não abrem conexão com o banco
+for variavel, valor in {
+    "DATABASE_HOSTNAME": "localhost",
+    "DATABASE_PORT": "5432",
+    "DATABASE_NAME": "celulares",
+    "DATABASE_PASSWORD": "teste",
+    "DATABASE_USERNAME": "teste",
+    "JWT_SECRET_KEY": "teste",
+    "FIRST_LOGIN": "teste",
+    "FIRST_PASSWORD": "teste",
+    "FIRST_EMAIL": "teste@example.com",
+    "ENVIRONMENT": "test",
+}.items():
+    os.environ.setdefault(variavel, valor)
@@ -0,0 +1,51 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+
+from sklearn.impute import SimpleImputer  # noqa: E402
+from sklearn.pipeline import Pipeline  # noqa: E402
+
+from app.services.training import (  # noqa: E402
+    ESPACO_BUSCA, ESTIMADORES, LIMITES_COMPACTA, buscar_hiperparametros,
+)
+
+
+def _dentro_dos_limites(params: dict):
+    assert params["n_estimators"] <= LIMITES_COMPACTA["n_estimators"]
+    assert params["max_depth"] is not None
+    assert params["max_depth"] <= LIMITES_COMPACTA["max_depth"]
+    assert params["min_samples_leaf"] >= LIMITES_COMPACTA["min_samples_leaf"]
+
+
+def test_espaco_da_floresta_compacta_respeita_os_limites():
+    espaco = ESPACO_BUSCA["floresta_compacta"]
+    assert max(espaco["model__n_estimators"]) <= LIMITES_COMPACTA["n_estimators"]
+    assert None not in espaco["model__max_depth"]
+    assert max(espaco["model__max_depth"]) <= LIMITES_COMPACTA["max_depth"]
+    assert min(espaco["model__min_samples_leaf"]) >= LIMITES_COMPACTA["min_samples_leaf"]
+
+
+def test_busca_da_floresta_compacta_gera_modelo_compacto():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, 4)), columns=["a", "b", "c", "d"])
+    y = pd.Series(X["a"] * 3 + X["b"] ** 2 + rng.normal(scale=0.1, size=300))
+    regressor = Pipeline(steps=[
+        ("preprocessor", SimpleImputer(strategy="median")),
+        ("model", ESTIMADORES["floresta_compacta"]()),
+    ])
+
+    params, candidatos = buscar_hiperparametros(
+        regressor, ESPACO_BUSCA["floresta_compacta"], X, y,
+        orcamento_s=600, max_candidatos=8,
+    )
+
+    assert candidatos
+    for candidato in candidatos:
+        _dentro_dos_limites({**LIMITES_COMPACTA, **candidato["params"]})
+
+    modelo = regressor.set_params(**params).fit(X, y).named_steps["model"]
+    _dentro_dos_limites(modelo.get_params())
+    assert len(modelo.estimators_) <= LIMITES_COMPACTA["n_estimators"]
+    assert max(arvore.get_depth() for arvore in modelo.estimators_) <= LIMITES_COMPACTA["max_depth"]
@@ -0,0 +1,43 @@
+import itertools
+import signal
+
+from app.workers import ConjuntoWorkers
+
+
+def _conjunto(quantidade: int):
+    pids = itertools.count(100)
+    sinais = []
+    conjunto = ConjuntoWorkers(lambda: next(pids), lambda pid, sinal: sinais.append((pid, sinal)))
+    for _ in range(quantidade):
+        conjunto.iniciar()
+    return conjunto, sinais
+
+
+def test_duas_trocas_seguidas_mantem_o_numero_de_workers():
+    conjunto, sinais = _conjunto(4)
+    originais = set(conjunto.workers)
+
+    conjunto.trocar()
+    primeira_troca = conjunto.ativos
+    # Os originais ainda estão saindo quando chega o segundo artefato
+    conjunto.trocar()
+
+    assert len(conjunto.ativos) == 4
+    assert conjunto.ativos.isdisjoint(originais | primeira_troca)
+    # 4 originais e 4 da primeira troca saindo, mais os 4 novos
+    assert len(conjunto.workers) == 12
+    # Cada worker substituído recebe um único SIGTERM
+    assert sorted(pid for pid, _ in sinais) == sorted(originais | primeira_troca)
+    assert {sinal for _, sinal in sinais} == {signal.SIGTERM}
+
+    for pid in originais | primeira_troca:
+        assert conjunto.terminou(pid) is False
+    assert conjunto.workers == conjunto.ativos
+    assert len(conjunto.workers) == 4
+
+
+def test_worker_que_cai_deve_ser_recriado():
+    conjunto, _ = _conjunto(2)
+    pid = next(iter(conjunto.ativos))
+    assert conjunto.terminou(pid) is True
+    assert len(conjunto.workers) == 1